@@ -1,232 +1,859 @@
-from code.utils import calculate_distances, fix_cluster_labels
-
-from sklearn.cluster import AgglomerativeClustering, DBSCAN
-from sklearn import metrics
-import pandas as pd
-from tqdm import tqdm
-
-########################################################################################################################################################################################################
-
-# cluster and select the best clustering for the provided data, using agglomerative clustering
-def create_cluster_agglo (data, penalty):
-  stdev = 0.127
-  sd_threshold = stdev
-
-  max_dist, min_dist, avg_dist, median_dist = calculate_distances(data)
-
-  # determine distance thresholds
-  base = median_dist
-  dist_range = max_dist - median_dist
-  step = dist_range/7
-  distances = []
-  for i in range(5):
-    base += step
-    distances.append(base)
-  #print(median_dist, max_dist)
-  #print(distances)
-  
-  # variables to keep track of best clustering
-  best_score = -2
-  best_clustering = None
-  best_dist = None
-  best_linkage = None
-  best_num_clusters = 0
-
-  linkage_types = ['complete', 'average', 'single',]
-
-  total_progress = 15
-  progress_bar = tqdm(total=total_progress)
-  # try each distance with each linkage type
-  for i, dist_thres in enumerate(distances):
-    for linkage in linkage_types:
-      progress_bar.update(1)
-      # perform the clustering
-      clustering = AgglomerativeClustering(n_clusters=None, linkage=linkage, distance_threshold=dist_thres)
-      labels = clustering.fit_predict(data)
-      num_clusters = len(set(labels))
-      #print("Clustering with linkage", linkage, "and distance", i, round(dist_thres, 4), "created", num_clusters, "clusters.")
-
-      if len(set(labels)) > 1:
-        # calculate score and apply penalty
-        score = metrics.silhouette_score(data, labels)
-        if penalty and len(set(labels)) == 2:
-          score = score * 0.85
-        # better score and more clusters OR significantly better score and less clusters OR current best has a lot of clusters
-        if  ((score > best_score and num_clusters > best_num_clusters) or
-            (score > best_score + sd_threshold and num_clusters < best_num_clusters) or
-            (best_num_clusters > 10 and score > best_score)):
-          ##print("New best: score:", round(score, 4), "|  # clusters:", num_clusters)
-          best_score = score
-          best_clustering = labels
-          best_num_clusters = num_clusters
-          best_dist = i
-          best_linkage = linkage
-          print("New pb")
-
-  progress_bar.close()
-
-  if best_score == -2:
-    return None
-  else:
-    print("Final best score of", round(best_score, 3), "found for distance", best_dist, "of", round(distances[best_dist], 4), "with linkage type", best_linkage)
-    print("Number of new clusters:", len(list(set(best_clustering))))
-    return best_clustering
-
-########################################################################################################################################################################################################
-
-# cluster and select the best clustering for the provided data, using DBSCAN clustering
-def create_cluster_dbscan (data):
-  stdev = 0.127
-  sd_threshold = stdev
-
-  max_dist, min_dist, avg_dist, median_dist = calculate_distances(data)
-
-  # determine initial distance thresholds
-  distances = []
-
-  steps = 15
-  step = (max_dist - min_dist) / steps
-
-  next_dist = min_dist + step
-  for i in range(5):
-    distances.append(next_dist)
-    next_dist += step
-
-  best_score = -2
-  best_dist = 0
-  best_num_clusters = 0
-  best_clustering = None
-
-  # create progress bar
-  total_progress = 5
-  progress_bar = tqdm(total=total_progress)
-
-  # try each distance
-  for dist in distances:
-    progress_bar.update(1)
-    #perform the clustering
-    dbscan = DBSCAN(eps=dist, min_samples=1).fit(data)
-    num_clusters = len(set(dbscan.labels_))
-
-    if num_clusters > 1:
-      # calculate the score
-      score = metrics.silhouette_score(data, dbscan.labels_)
-
-      # better score and more clusters OR significantly better score and less clusters OR current best has a lot of clusters
-      if ((score > best_score and num_clusters > best_num_clusters) or
-       (score > (best_score + sd_threshold) and num_clusters < best_num_clusters) or
-       (best_num_clusters > 10 and score > best_score)):
-        ##print("New best: score:", round(score, 4), "|  # clusters:", num_clusters)
-        best_score = score
-        best_num_clusters = num_clusters
-        best_clustering = dbscan
-        best_dist = dist
-
-  progress_bar.close()
-
-  if best_score == -2:
-    print("Every attempt created only one cluster. Trying with agglomerative clustering")
-    labels = create_cluster_agglo(data, False)
-
-    return labels
-
-  print("Best score of", round(best_score, 3), "found for esp =", round(best_dist, 4))
-  print("Number of new clusters:", len(list(set(best_clustering.labels_))))
-  return best_clustering.labels_
-
-########################################################################################################################################################################################################
-
-# start the initial clustering 
-def start_initial_clustering (dataset, algorithm, penalty):
-  # prepare data
-  X = dataset['location-long'].values.tolist()
-  Y = dataset['location-lat'].values.tolist()
-
-  xy_data = list(zip(X,Y))
-
-  # agglomerative clustering
-  if algorithm == 'agglo':
-    labels = create_cluster_agglo(xy_data, penalty)
-  # DBSCAN clustering
-  elif algorithm == 'dbscan':
-    labels = create_cluster_dbscan (xy_data)
-
-  if labels is not None:
-    # add labels to the data
-    dataset['label'] = labels
-
-    return dataset
-  
-  print("Every attempt created only one cluster. No best clustering formation found. Please inspect your data.")
-  return None
-
-########################################################################################################################################################################################################
-
-# make an adjustment: recluster the given clusters
-def adjust_reclustering(dataset, algorithm, clusters, penalty):
-  # select data with these clusters
-  data_recluster = dataset[dataset['label'].isin(clusters)].copy()
-  data_original = dataset[~dataset['label'].isin(clusters)].copy()
-
-  # prepare data
-  X = data_recluster['location-long'].values.tolist()
-  Y = data_recluster['location-lat'].values.tolist()
-
-  xy_data = list(zip(X,Y))
-
-  # agglomerative clustering
-  if algorithm == 'agglo':
-    labels = create_cluster_agglo(xy_data, penalty)
-  # DBSCAN clustering
-  elif algorithm == 'dbscan':
-    labels = create_cluster_dbscan (xy_data)
-
-  # succesful clustering
-  if labels is not None:
-    # merge data with labels
-    new_label_indexes = fix_cluster_labels(list(set(data_original['label'].tolist())), list(set(labels)))
-    reclustered_labels = [new_label_indexes[label] for label in labels]
-    data_recluster['label'] = reclustered_labels
-
-    # combine initial and new clustering
-    data_new = pd.concat([data_recluster, data_original]).sort_values(by=['timestamp']).reset_index(drop=True)
-
-    return data_new
-  else:
-    print("Only 1 cluster created - clustering cancelled.")
-    return None
-
-########################################################################################################################################################################################################
-
-# make an adjustment: merge the given clusters into one cluster
-def adjust_merge(dataset, clusters):
-  # select and merge data
-  new_cluster = min(clusters)
-  data_to_merge = dataset[dataset['label'].isin(clusters)].copy()
-  data_to_merge['label'] = new_cluster
-
-  # find new labels
-  original_data = dataset[~dataset['label'].isin(clusters)].copy()
-  new_total_clusters = len(original_data['label'].unique().tolist()) + 1
-  original_data_labels = original_data['label'].unique().tolist()
-
-  new_label_indexes = {}
-  for i in range(new_total_clusters):
-    if i == new_cluster:
-      continue
-    # update dictionary; for this old label, have this new value
-    new_label_indexes[original_data_labels[0]] = i
-    original_data_labels.pop(0)
-    # make sure we exit when we're done
-    if len(original_data_labels) == 0:
-      break
-
-  # set new labels
-  old_labels = original_data['label'].values.tolist()
-  new_labels = [new_label_indexes[label] for label in old_labels]
-  original_data['label'] = new_labels
-
-  # merge new and original data
-  data_new = pd.concat([data_to_merge, original_data]).sort_values(by=['timestamp']).reset_index(drop=True)
-
-  return data_new
\ No newline at end of file
+from code.utils import calculate_distances, fix_cluster_labels, resample_regular, compress_points
+from code.scoring import PENALTY_FACTOR, return_scoring_mode, is_sampled, score_clustering, scores_overlap
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from sklearn.cluster import DBSCAN
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import cdist, pdist, squareform
+import numpy as np
+from tqdm import tqdm
+
+# number of distances computed at once when filling the distance matrix
+DISTANCE_CHUNK_SIZE = 2 ** 22
+
+# candidate clusterings are fitted and scored in a 'thread' or 'process' pool, with 1 worker they run one after another
+CANDIDATE_POOL = 'thread'
+CANDIDATE_WORKERS = os.cpu_count() or 1
+# memory (in GB) that the candidates evaluated at the same time may use together, which limits the number of workers
+CANDIDATE_MEMORY = 4
+
+# DBSCAN engine: 'reachability' builds one tree and extracts the labels for every eps from it, 'dbscan' fits DBSCAN per eps
+# as extracting is nearly free, the reachability engine tries a finer range of eps values
+DBSCAN_ENGINE = 'reachability'
+REACHABILITY_EPS_STEPS = 20
+
+# above COMPRESSION_MIN_POINTS fixes, fixes in the same grid cell (in degrees, about 5 meters) are clustered as one weighted point,
+# None only merges identical fixes, up to COMPRESSION_MIN_POINTS fixes every fix is clustered as it is
+# linkage trees do not weigh the points, so an average linkage tree of compressed points can differ from that of the fixes
+COMPRESSION_GRID = 0.00005
+COMPRESSION_MIN_POINTS = 10000
+
+# threshold search: 'grid' tries fixed thresholds derived from the track, 'adaptive' maps thresholds to cluster counts on the tree,
+# scores a coarse range of thresholds (up to SEARCH_MAX_CLUSTERS clusters) and refines around the best score with golden-section steps
+# SEARCH_BUDGET is the number of scored clusterings per tree, thresholds with an already scored cluster count are free
+# the grid is the default, as the adaptive search can still miss a cut that the grid finds
+SEARCH_MODE = 'grid'
+SEARCH_MAX_CLUSTERS = 50
+SEARCH_COARSE_STEPS = 5
+SEARCH_BUDGET = 10
+GOLDEN_RATIO = (np.sqrt(5) - 1) / 2
+
+# above this many points, the fixes are summarized into micro-clusters (grid cells) of an automatically chosen size,
+# doubled until there are at most MICRO_CLUSTER_TARGET cells, the clustering then runs on the micro-clusters
+MICRO_CLUSTER_MIN_POINTS = 40000
+MICRO_CLUSTER_TARGET = 4000
+
+# maximum number of subtrees a reused tree of a subset of the points is built from, with more the tree is built again
+SUBSET_TREE_MAX_ROOTS = 1000
+
+########################################################################################################################################################################################################
+
+# raised when a clustering is cancelled (see the cancelled event of CandidatePool), between candidates or steps
+class ClusteringCancelled(Exception):
+  pass
+
+########################################################################################################################################################################################################
+
+# prints the progress of a clustering, unless it runs quietly (such as in the background)
+def report (quiet, *values):
+  if not quiet:
+    print(*values)
+
+########################################################################################################################################################################################################
+
+# raises ClusteringCancelled if the cancelled event is set
+def check_cancelled (cancelled):
+  if cancelled is not None and cancelled.is_set():
+    raise ClusteringCancelled()
+
+########################################################################################################################################################################################################
+
+# returns the memory footprint (in GB) of a distance matrix of n points, as square or condensed matrix
+# the square matrix is float32, itemsize 8 gives the float64 condensed matrix that the linkage trees are built from
+def return_matrix_size (n, square=True, itemsize=4):
+  entries = n * n if square else n * (n - 1) // 2
+  return entries * itemsize / 1024 ** 3
+
+########################################################################################################################################################################################################
+
+# returns the pairwise distances of the data as a float32 square matrix, which is shared by all clusterings and scores
+# it is filled in blocks of rows, so only the float32 matrix itself is held in memory at once
+def return_distance_matrix (data, quiet=False):
+  data = np.asarray(data, dtype=np.float64)
+  n = data.shape[0]
+  report(quiet, "Allocating a", n, "x", n, "distance matrix (float32):", round(return_matrix_size(n), 3), "GB")
+
+  matrix = np.empty((n, n), dtype=np.float32)
+  rows = max(1, DISTANCE_CHUNK_SIZE // max(n, 1))
+  for start in range(0, n, rows):
+    matrix[start:start + rows] = cdist(data[start:start + rows], data)
+
+  return matrix
+
+########################################################################################################################################################################################################
+
+# returns the confidence interval of a score as text
+def return_interval_text (interval):
+  if interval == 0:
+    return "(exact)"
+  return "(+/- " + str(round(interval, 3)) + ")"
+
+########################################################################################################################################################################################################
+
+# returns the labels (0 to k-1) of a linkage tree cut at the given distance threshold
+# like AgglomerativeClustering, clusters are only merged when their distance is below the threshold
+def cut_linkage_tree (tree, threshold):
+  labels = hierarchy.fcluster(tree, t=np.nextafter(threshold, 0), criterion='distance')
+  _, labels = np.unique(labels, return_inverse=True)
+  return labels
+
+########################################################################################################################################################################################################
+
+# returns the condensed distance matrix of the points as float64, which hierarchy.linkage uses without copying it
+# without the square matrix it is computed from the points, so the trees can be built before the square matrix exists,
+# the distances are rounded to float32 like those of the square matrix, so the trees are the same either way
+# with the square matrix it is filled one row at a time, so no float32 condensed copy is made
+def return_condensed_matrix (points, distance_matrix=None, quiet=False):
+  n = len(points)
+  if distance_matrix is None:
+    report(quiet, "Building the condensed distance matrix (float64):", round(return_matrix_size(n, False, 8), 3), "GB")
+    condensed = pdist(np.asarray(points, dtype=np.float64))
+    for start in range(0, len(condensed), DISTANCE_CHUNK_SIZE):
+      condensed[start:start + DISTANCE_CHUNK_SIZE] = condensed[start:start + DISTANCE_CHUNK_SIZE].astype(np.float32)
+    return condensed
+
+  report(quiet, "Building the condensed distance matrix (float64):", round(return_matrix_size(n, False, 8), 3), "GB, on top of the square matrix")
+  condensed = np.empty(n * (n - 1) // 2, dtype=np.float64)
+  start = 0
+  for i in range(n - 1):
+    condensed[start:start + n - 1 - i] = distance_matrix[i, i + 1:]
+    start += n - 1 - i
+  return condensed
+
+########################################################################################################################################################################################################
+
+# returns the reachability tree of the data, from which DBSCAN labels (min_samples=1) can be extracted for any eps
+# with min_samples=1 the DBSCAN clusters are the groups of points connected by distances of at most eps,
+# which are the clusters of the single linkage tree (the spanning tree of the OPTICS reachability distances) cut at eps
+def return_reachability_tree (points, distance_matrix=None, quiet=False):
+  return hierarchy.linkage(return_condensed_matrix(points, distance_matrix, quiet), method='single')
+
+########################################################################################################################################################################################################
+
+# returns the labels (0 to k-1) of DBSCAN with min_samples=1 for the given eps, extracted from the reachability tree
+def extract_dbscan_labels (tree, eps):
+  labels = hierarchy.fcluster(tree, t=eps, criterion='distance')
+  _, labels = np.unique(labels, return_inverse=True)
+  return labels
+
+########################################################################################################################################################################################################
+
+# returns the linkage tree of a subset of the points (sorted indexes) taken from the tree of all points, or None if it cannot be reused
+# the subset is split into the largest subtrees that only contain subset points; if every subtree is complete before any of them
+# merges with other points, their merges are the same without the other points and only the merges between the subtrees are new,
+# these are computed from the distances between the subtrees (single and complete linkage only, average needs the subtree sizes)
+def extract_subset_tree (tree, subset, linkage, distance_matrix):
+  n = tree.shape[0] + 1
+  children = tree[:, :2].astype(np.int64)
+  heights = np.concatenate([np.zeros(n), tree[:, 2]])
+
+  # subtrees with only subset points, and the height at which each node merges with another node
+  child_list = children.tolist()
+  full = np.zeros(n, dtype=bool)
+  full[subset] = True
+  full = full.tolist()
+  for a, b in child_list:
+    full.append(full[a] and full[b])
+  full = np.array(full)
+  parent = np.full(2 * n - 1, -1)
+  parent[children.ravel()] = np.repeat(np.arange(n, 2 * n - 1), 2)
+  parent_heights = np.full(2 * n - 1, np.inf)
+  parent_heights[parent >= 0] = heights[parent[parent >= 0]]
+
+  # a subtree that is only complete after another subtree merged with other points is split into its two children
+  roots = np.flatnonzero(full & ~((parent >= 0) & full[np.maximum(parent, 0)]))
+  while heights[roots].max() >= parent_heights[roots].min():
+    if len(roots) >= SUBSET_TREE_MAX_ROOTS or heights[roots].max() == 0:
+      return None
+    highest = np.argmax(heights[roots])
+    roots = np.concatenate([np.delete(roots, highest), children[roots[highest] - n]])
+  if len(roots) > 1 and linkage not in ['single', 'complete']:
+    return None
+
+  # the merges within the subtrees, in the order of the tree, with the subset points numbered 0 to m-1
+  m = len(subset)
+  new_ids = dict(zip(subset.tolist(), range(m)))
+  members = []
+  rows = []
+  for root in roots:
+    stack = [root]
+    leaves = []
+    while stack:
+      node = stack.pop()
+      if node < n:
+        leaves.append(node)
+      else:
+        rows.append(node - n)
+        stack.extend(child_list[node - n])
+    members.append(np.searchsorted(subset, leaves))
+
+  subset_tree = []
+  for row in sorted(rows):
+    subset_tree.append([new_ids[child_list[row][0]], new_ids[child_list[row][1]], heights[n + row], tree[row, 3]])
+    new_ids[n + row] = m + len(subset_tree) - 1
+
+  # the merges between the subtrees
+  if len(roots) > 1:
+    # shortest (single) or longest (complete) distance between the points of every two subtrees
+    reduce = np.minimum if linkage == 'single' else np.maximum
+    order = np.concatenate(members)
+    starts = np.cumsum([0] + [len(leaves) for leaves in members[:-1]])
+    root_distances = np.array([reduce.reduceat(reduce.reduce(distance_matrix[leaves], axis=0)[order], starts) for leaves in members])
+    # nodes of the linkage between the subtrees are renumbered: subtrees to their root, merges after the subtree merges
+    node_ids = [new_ids[root] for root in roots] + list(range(m + len(subset_tree), m + len(subset_tree) + len(roots) - 1))
+    counts = [len(leaves) for leaves in members]
+    for a, b, height, count in hierarchy.linkage(squareform(root_distances, checks=False), method=linkage):
+      counts.append(counts[int(a)] + counts[int(b)])
+      subset_tree.append([node_ids[int(a)], node_ids[int(b)], height, counts[-1]])
+
+  return np.array(subset_tree, dtype=np.float64)
+
+########################################################################################################################################################################################################
+
+# returns the grid (in degrees) that n fixes are compressed with: 0 (not compressed) up to COMPRESSION_MIN_POINTS fixes, COMPRESSION_GRID above
+def return_compression_grid (n):
+  if n <= COMPRESSION_MIN_POINTS:
+    return 0
+  return COMPRESSION_GRID
+
+########################################################################################################################################################################################################
+
+# returns the weighted points to cluster, their weights, for every fix the index of its point and the grid (in degrees) they were compressed with
+# large data is summarized into micro-clusters, whose fixes all get the label of the micro-cluster
+def summarize_points (data, quiet=False):
+  grid = return_compression_grid(len(data))
+  if grid == 0:
+    points = np.asarray(data, dtype=np.float64)
+    return points, np.ones(len(points), dtype=np.int64), np.arange(len(points)), grid
+
+  points, weights, inverse = compress_points(data, grid)
+
+  if len(points) > MICRO_CLUSTER_MIN_POINTS:
+    grid = grid or 0.00001
+    while len(points) > MICRO_CLUSTER_TARGET:
+      grid = grid * 2
+      points, weights, inverse = compress_points(data, grid)
+    report(quiet, "Summarized", len(inverse), "points into", len(points), "micro-clusters with a grid of", round(grid, 6), "degrees")
+  else:
+    report(quiet, "Compressed", len(inverse), "points to", len(points), "weighted points")
+
+  return points, weights, inverse, grid
+
+########################################################################################################################################################################################################
+
+# returns the points to cluster, their weights, for every fix the index of its point, the distance matrix and the points of the session they are
+# with a session, the points and distances of the initial clustering are reused (index identifies the rows of the data)
+# new distances are not computed yet (the matrix is None), see complete_distance_matrix
+def prepare_points (data, session=None, index=None, quiet=False):
+  if session is not None:
+    return session.prepare(data, index, quiet)
+  points, weights, inverse, _ = summarize_points(data, quiet)
+  return points, weights, inverse, None, None
+
+########################################################################################################################################################################################################
+
+# returns the distance matrix of the points, computing it if it was not computed yet, and keeps it in the session
+# it is computed after the trees are built, so the square and the condensed matrix are not held at the same time
+def complete_distance_matrix (points, distance_matrix, session, subset, quiet=False):
+  if distance_matrix is None:
+    distance_matrix = return_distance_matrix(points, quiet)
+    if session is not None:
+      session.store_distance_matrix(subset, distance_matrix)
+  return distance_matrix
+
+########################################################################################################################################################################################################
+
+# returns the linkage tree of the session for the given points, or None if there is no session or no tree to reuse
+def return_session_tree (session, linkage, subset, distance_matrix, quiet=False):
+  if session is None:
+    return None
+  return session.return_tree(linkage, subset, distance_matrix, quiet)
+
+########################################################################################################################################################################################################
+
+# keeps a tree in the session, so later reclusterings can reuse it
+def store_session_tree (session, linkage, subset, tree):
+  if session is not None:
+    session.store_tree(linkage, subset, tree)
+
+########################################################################################################################################################################################################
+
+# returns the labels of a candidate clustering: ('cut', tree, threshold), ('dbscan', eps) or ('reachability', tree, eps)
+def return_candidate_labels (distance_matrix, candidate, weights):
+  if candidate[0] == 'dbscan':
+    return DBSCAN(eps=candidate[1], min_samples=1, metric='precomputed').fit(distance_matrix, sample_weight=weights).labels_
+  if candidate[0] == 'reachability':
+    return extract_dbscan_labels(candidate[1], candidate[2])
+  return cut_linkage_tree(candidate[1], candidate[2])
+
+########################################################################################################################################################################################################
+
+# fits and scores a candidate clustering, clusterings with only one cluster are not scored
+def evaluate_candidate (distance_matrix, candidate, scoring, penalty, weights):
+  labels = return_candidate_labels(distance_matrix, candidate, weights)
+  if len(set(labels)) > 1:
+    score, interval = score_clustering(distance_matrix, labels, scoring, penalty, weights)
+  else:
+    score, interval = None, None
+  return labels, score, interval
+
+########################################################################################################################################################################################################
+
+# evaluates a candidate in a worker process, using the distance matrix in shared memory
+def evaluate_shared_candidate (memory_name, shape, candidate, scoring, penalty, weights):
+  memory = shared_memory.SharedMemory(name=memory_name)
+  try:
+    distance_matrix = np.ndarray(shape, dtype=np.float32, buffer=memory.buf)
+    result = evaluate_candidate(distance_matrix, candidate, scoring, penalty, weights)
+    distance_matrix = None
+  finally:
+    memory.close()
+  return result
+
+########################################################################################################################################################################################################
+
+# returns the number of workers for evaluating the candidates, limited by the memory a candidate may need
+# DBSCAN can hold the neighbours of every point (up to 12 bytes per pair), a scored cut about as much as the distance matrix
+# workers overrides CANDIDATE_WORKERS, such as 1 for a clustering that runs next to other work
+def return_candidate_workers (n, num_candidates, dbscan=False, workers=None):
+  if dbscan:
+    task_memory = return_matrix_size(n) * 3
+  else:
+    task_memory = return_matrix_size(n)
+  memory_workers = max(1, int(CANDIDATE_MEMORY / max(task_memory, 1e-9)))
+  if workers is None:
+    workers = CANDIDATE_WORKERS
+  return min(workers, memory_workers, max(num_candidates, 1))
+
+########################################################################################################################################################################################################
+
+# pool that fits and scores candidates, created once for a whole sweep or search
+# worker processes share one copy of the distance matrix in shared memory, threads use it directly,
+# with 1 worker there is no pool and each candidate is evaluated when its result is needed
+# when the cancelled event is set, the next result that is asked for raises ClusteringCancelled
+class CandidatePool():
+  def __init__(self, distance_matrix, workers, scoring, penalty, weights=None, cancelled=None):
+    self.distance_matrix = distance_matrix
+    self.scoring = scoring
+    self.penalty = penalty
+    self.weights = weights
+    self.cancelled = cancelled
+    self.executor = None
+    self.memory = None
+
+    if workers > 1 and CANDIDATE_POOL == 'process':
+      self.memory = shared_memory.SharedMemory(create=True, size=max(distance_matrix.nbytes, 1))
+      np.ndarray(distance_matrix.shape, dtype=np.float32, buffer=self.memory.buf)[:] = distance_matrix
+      self.executor = ProcessPoolExecutor(max_workers=workers)
+    elif workers > 1:
+      self.executor = ThreadPoolExecutor(max_workers=workers)
+
+  def __enter__ (self):
+    return self
+
+  def __exit__ (self, *args):
+    self.close()
+
+########################################################################################################################################################################################################
+
+  # starts evaluating a candidate and returns its future, or None without a pool
+  # the progress bar is updated when the candidate is done or cancelled
+  def submit (self, candidate, progress_bar=None):
+    if self.executor is None:
+      return None
+
+    if self.memory is not None:
+      future = self.executor.submit(evaluate_shared_candidate, self.memory.name, self.distance_matrix.shape, candidate, self.scoring, self.penalty, self.weights)
+    else:
+      future = self.executor.submit(evaluate_candidate, self.distance_matrix, candidate, self.scoring, self.penalty, self.weights)
+    if progress_bar is not None:
+      future.add_done_callback(lambda _: progress_bar.update(1))
+    return future
+
+########################################################################################################################################################################################################
+
+  # returns the labels, score and interval of a candidate, waiting for its future, or evaluating it now without a pool
+  # a cancelled candidate is evaluated now as well, its progress was already counted when it was cancelled
+  def return_result (self, candidate, future, progress_bar=None):
+    check_cancelled(self.cancelled)
+    if future is not None and not future.cancelled():
+      return future.result()
+
+    result = evaluate_candidate(self.distance_matrix, candidate, self.scoring, self.penalty, self.weights)
+    if future is None and progress_bar is not None:
+      progress_bar.update(1)
+    return result
+
+########################################################################################################################################################################################################
+
+  # evaluates the candidates at the same time and returns the results in the order of the candidates, regardless of which finishes first
+  def evaluate (self, candidates, progress_bar=None):
+    futures = [self.submit(candidate, progress_bar) for candidate in candidates]
+    return [self.return_result(candidate, future, progress_bar) for candidate, future in zip(candidates, futures)]
+
+########################################################################################################################################################################################################
+
+  # stops the workers, candidates that did not start are cancelled, and frees the shared memory
+  def close (self):
+    if self.executor is not None:
+      self.executor.shutdown(wait=True, cancel_futures=True)
+      self.executor = None
+    if self.memory is not None:
+      self.memory.close()
+      self.memory.unlink()
+      self.memory = None
+
+########################################################################################################################################################################################################
+
+# returns the number of clusters when the tree is cut at the threshold, inclusive cuts also merge at the threshold itself
+def return_cluster_count (tree, threshold, inclusive):
+  merges = np.searchsorted(tree[:, 2], threshold, side='right' if inclusive else 'left')
+  return tree.shape[0] + 1 - merges
+
+########################################################################################################################################################################################################
+
+# returns the range of thresholds to search on a tree: from about SEARCH_MAX_CLUSTERS clusters to 2 clusters
+def return_search_range (tree, inclusive):
+  heights = tree[:, 2]
+  n = tree.shape[0] + 1
+  high = heights[-1]
+  if inclusive:
+    high = np.nextafter(high, 0)
+  low = heights[max(n - SEARCH_MAX_CLUSTERS - 1, 0)]
+  return max(low, high * 1e-6), high
+
+########################################################################################################################################################################################################
+
+# adaptive threshold search on one or more trees (name -> tree), cut with the given candidate kind ('cut' or 'reachability')
+# returns the scored clusterings as (threshold, name, labels, score, interval), ordered by number of clusters (fewest first) and tree
+# the selection rule depends on the order, with many clusters first a better clustering with fewer clusters would need a much higher score
+def search_thresholds (distance_matrix, trees, kind, scoring, penalty, weights, quiet=False, workers=None, cancelled=None):
+  inclusive = kind == 'reachability'
+  names = list(trees.keys())
+  # scored clusterings of each tree by cluster count, a cut with the same count gives the same clustering
+  scored = {name: {} for name in names}
+
+  # one pool for the whole search, a batch holds at most the coarse steps of all trees
+  workers = return_candidate_workers(distance_matrix.shape[0], SEARCH_COARSE_STEPS * len(names), False, workers)
+  report(quiet, "Searching thresholds with", workers, "worker(s) in a", CANDIDATE_POOL, "pool")
+  progress_bar = tqdm(total=SEARCH_BUDGET * len(names), disable=quiet)
+
+  with CandidatePool(distance_matrix, workers, scoring, penalty, weights, cancelled) as pool:
+    # returns the score of each (name, threshold), scoring the new cluster counts in one batch
+    def evaluate_thresholds (requests):
+      new = {}
+      for name, threshold in requests:
+        num_clusters = return_cluster_count(trees[name], threshold, inclusive)
+        if num_clusters > 1 and num_clusters not in scored[name] and len(scored[name]) < SEARCH_BUDGET:
+          new.setdefault((name, num_clusters), threshold)
+      candidates = [(kind, trees[name], threshold) for (name, _), threshold in new.items()]
+      results = pool.evaluate(candidates, progress_bar)
+      for ((name, num_clusters), threshold), (labels, score, interval) in zip(new.items(), results):
+        scored[name][num_clusters] = (threshold, labels, score, interval)
+
+      scores = []
+      for name, threshold in requests:
+        entry = scored[name].get(return_cluster_count(trees[name], threshold, inclusive))
+        scores.append(-np.inf if entry is None or entry[2] is None else entry[2])
+      return scores
+
+    # coarse steps over the range of each tree, on a log scale
+    coarse = {}
+    for name in names:
+      low, high = return_search_range(trees[name], inclusive)
+      coarse[name] = np.geomspace(low, high, SEARCH_COARSE_STEPS)
+    coarse_scores = evaluate_thresholds([(name, threshold) for name in names for threshold in coarse[name]])
+
+    # bracket around the best coarse step, with the golden-section points in between
+    brackets = {}
+    for i, name in enumerate(names):
+      scores = coarse_scores[i * SEARCH_COARSE_STEPS:(i + 1) * SEARCH_COARSE_STEPS]
+      best = int(np.argmax(scores))
+      a = np.log(coarse[name][max(best - 1, 0)])
+      b = np.log(coarse[name][min(best + 1, SEARCH_COARSE_STEPS - 1)])
+      brackets[name] = [a, b, b - GOLDEN_RATIO * (b - a), a + GOLDEN_RATIO * (b - a), None, None]
+
+    requests = [(name, np.exp(x)) for name in names for x in brackets[name][2:4]]
+    scores = evaluate_thresholds(requests)
+    for i, name in enumerate(names):
+      brackets[name][4:6] = scores[2 * i:2 * i + 2]
+
+    # golden-section steps, until the budget is used or the bracket holds no other clusterings
+    for _ in range(SEARCH_BUDGET * 4):
+      active = [name for name in names if len(scored[name]) < SEARCH_BUDGET and
+                return_cluster_count(trees[name], np.exp(brackets[name][0]), inclusive) - return_cluster_count(trees[name], np.exp(brackets[name][1]), inclusive) > 1]
+      if len(active) == 0:
+        break
+
+      requests = []
+      for name in active:
+        a, b, c, d, fc, fd = brackets[name]
+        if fc >= fd:
+          b, d, fd = d, c, fc
+          c = b - GOLDEN_RATIO * (b - a)
+          brackets[name] = [a, b, c, d, None, fd]
+          requests.append((name, np.exp(c)))
+        else:
+          a, c, fc = c, d, fd
+          d = a + GOLDEN_RATIO * (b - a)
+          brackets[name] = [a, b, c, d, fc, None]
+          requests.append((name, np.exp(d)))
+
+      for (name, _), score in zip(requests, evaluate_thresholds(requests)):
+        if brackets[name][4] is None:
+          brackets[name][4] = score
+        else:
+          brackets[name][5] = score
+
+  progress_bar.close()
+
+  evaluated = []
+  for num_clusters, i, name in sorted((num_clusters, i, name) for i, name in enumerate(names) for num_clusters in scored[name]):
+    threshold, labels, score, interval = scored[name][num_clusters]
+    evaluated.append((threshold, name, labels, score, interval))
+  report(quiet, "Scored", len(evaluated), "clusterings with the adaptive threshold search")
+  return evaluated
+
+########################################################################################################################################################################################################
+
+# checks if a clustering with this many clusters can still become the best clustering under the selection rule
+# the highest possible score is 1, or the penalized score for 2 clusters, and an estimated best score counts at its lower bound
+def can_become_best (num_clusters, best, penalty, sd_threshold):
+  if num_clusters <= 1:
+    return False
+  max_score = PENALTY_FACTOR if penalty and num_clusters == 2 else 1
+  best_score = best['score'] - best['interval']
+
+  if num_clusters > best['num_clusters'] or best['num_clusters'] > 10:
+    return max_score > best_score
+  if num_clusters < best['num_clusters']:
+    return max_score > best_score + sd_threshold
+  return False
+
+########################################################################################################################################################################################################
+
+# applies the selection rule to a scored clustering, and updates the best clustering if it is better
+def select_best (best, threshold, name, labels, score, interval, distance_matrix, penalty, weights, sd_threshold, quiet=False):
+  num_clusters = len(set(labels))
+  if num_clusters <= 1:
+    return
+
+  # an estimated score that is too close to call is scored exactly, as is the best clustering
+  if scores_overlap(score, interval, best['score'], best['interval'], [0, sd_threshold]):
+    score, interval = score_clustering(distance_matrix, labels, 'exact', penalty, weights)
+    if best['interval'] > 0:
+      best['score'], best['interval'] = score_clustering(distance_matrix, best['labels'], 'exact', penalty, weights)
+
+  # better score and more clusters OR significantly better score and less clusters OR current best has a lot of clusters
+  if ((score > best['score'] and num_clusters > best['num_clusters']) or
+      (score > best['score'] + sd_threshold and num_clusters < best['num_clusters']) or
+      (best['num_clusters'] > 10 and score > best['score'])):
+    ##print("New best: score:", round(score, 4), "|  # clusters:", num_clusters)
+    best.update({'score': score, 'interval': interval, 'labels': labels, 'num_clusters': num_clusters, 'threshold': threshold, 'name': name})
+    report(quiet, "New pb")
+
+########################################################################################################################################################################################################
+
+# grid sweep: scores all candidates at the same time and applies the selection rule in order as their results come in
+# candidates is a list of thresholds, each with a list of (name, candidate, number of clusters or None if unknown)
+# candidates that cannot produce more than one cluster or cannot become the best clustering are skipped, or cancelled when they did not start yet
+def sweep_candidates (distance_matrix, candidates, best, penalty, weights, scoring, sd_threshold, quiet=False, workers=None, cancelled=None):
+  ordered = [(threshold, name, candidate, num_clusters) for threshold, threshold_candidates in candidates for name, candidate, num_clusters in threshold_candidates]
+  workers = return_candidate_workers(distance_matrix.shape[0], len(ordered), any(candidate[0] == 'dbscan' for _, _, candidate, _ in ordered), workers)
+  report(quiet, "Evaluating", len(ordered), "candidates with", workers, "worker(s) in a", CANDIDATE_POOL, "pool")
+  progress_bar = tqdm(total=len(ordered), disable=quiet)
+  skipped = 0
+
+  with CandidatePool(distance_matrix, workers, scoring, penalty, weights, cancelled) as pool:
+    futures = []
+    for _, _, candidate, num_clusters in ordered:
+      if num_clusters is None or can_become_best(num_clusters, best, penalty, sd_threshold):
+        futures.append(pool.submit(candidate, progress_bar))
+      else:
+        futures.append(None)
+
+    for i, (threshold, name, candidate, num_clusters) in enumerate(ordered):
+      # the best clustering can have changed since the candidate was submitted
+      if num_clusters is not None and not can_become_best(num_clusters, best, penalty, sd_threshold):
+        if futures[i] is None:
+          progress_bar.update(1)
+          skipped += 1
+        elif futures[i].cancel():
+          skipped += 1
+        progress_bar.set_postfix(skipped=skipped)
+        continue
+
+      labels, score, interval = pool.return_result(candidate, futures[i], progress_bar)
+      select_best(best, threshold, name, labels, score, interval, distance_matrix, penalty, weights, sd_threshold, quiet)
+
+      # later candidates that can no longer become the best clustering are cancelled before they start
+      for j in range(i + 1, len(ordered)):
+        if futures[j] is not None and ordered[j][3] is not None and not can_become_best(ordered[j][3], best, penalty, sd_threshold):
+          futures[j].cancel()
+
+  progress_bar.close()
+  if skipped > 0:
+    report(quiet, "Skipped", skipped, "of", len(ordered), "candidates that could not produce more than one cluster or beat the best clustering")
+
+########################################################################################################################################################################################################
+
+# cluster and select the best clustering for the provided data, using agglomerative clustering
+# the thresholds come from the track itself, the clustering and scores use its compressed (weighted) points
+# distance_matrix can be given when it was already computed for the compressed points of this data
+# scoring is 'exact', 'sampled' or 'auto', see scoring.py, search is 'grid' or 'adaptive', see SEARCH_MODE
+# without a scoring or search, SCORING_MODE and SEARCH_MODE are used as they are set at the time of the call
+# quiet hides the progress, workers overrides CANDIDATE_WORKERS and setting the cancelled event stops the clustering with ClusteringCancelled
+def create_cluster_agglo (data, penalty, prepared=None, scoring=None, search=None, session=None, index=None, quiet=False, workers=None, cancelled=None):
+  scoring = return_scoring_mode(scoring)
+  if search is None:
+    search = SEARCH_MODE
+  stdev = 0.127
+  sd_threshold = stdev
+
+  max_dist, min_dist, avg_dist, median_dist = calculate_distances(data)
+
+  # determine distance thresholds
+  base = median_dist
+  dist_range = max_dist - median_dist
+  step = dist_range/7
+  distances = []
+  for i in range(5):
+    base += step
+    distances.append(base)
+  #print(median_dist, max_dist)
+  #print(distances)
+  
+  # variables to keep track of best clustering
+  best = {'score': -2, 'interval': 0, 'labels': None, 'num_clusters': 0, 'threshold': None, 'name': None}
+
+  linkage_types = ['complete', 'average', 'single',]
+
+  if prepared is None:
+    prepared = prepare_points(data, session, index, quiet)
+  points, weights, inverse, distance_matrix, subset = prepared
+  # fixes that all fall into one grid cell (such as a bird sitting still) cannot be split
+  if len(points) < 2:
+    report(quiet, "All fixes fall into one point, they cannot be clustered")
+    return None
+  if is_sampled(scoring, len(points)):
+    report(quiet, "Scoring with a sampled silhouette score")
+
+  # the tree of a linkage type does not depend on the threshold, so it is built once and cut at each threshold
+  # trees of the session are reused when possible
+  condensed = None
+  trees = {}
+  for linkage in linkage_types:
+    check_cancelled(cancelled)
+    trees[linkage] = return_session_tree(session, linkage, subset, distance_matrix, quiet)
+    if trees[linkage] is None:
+      if condensed is None:
+        report(quiet, "Building linkage trees")
+        condensed = return_condensed_matrix(points, distance_matrix, quiet)
+      trees[linkage] = hierarchy.linkage(condensed, method=linkage)
+      store_session_tree(session, linkage, subset, trees[linkage])
+  condensed = None
+  distance_matrix = complete_distance_matrix(points, distance_matrix, session, subset, quiet)
+
+  if search == 'adaptive':
+    for dist_thres, linkage, labels, score, interval in search_thresholds(distance_matrix, trees, 'cut', scoring, penalty, weights, quiet, workers, cancelled):
+      select_best(best, dist_thres, linkage, labels, score, interval, distance_matrix, penalty, weights, sd_threshold, quiet)
+  else:
+    # try each distance with each linkage type, the number of clusters of a cut is known from the tree before scoring
+    candidates = []
+    for dist_thres in distances:
+      candidates.append((dist_thres, [(linkage, ('cut', trees[linkage], dist_thres), return_cluster_count(trees[linkage], dist_thres, False)) for linkage in linkage_types]))
+    sweep_candidates(distance_matrix, candidates, best, penalty, weights, scoring, sd_threshold, quiet, workers, cancelled)
+
+  if best['score'] == -2:
+    return None
+  else:
+    report(quiet, "Final best score of", round(best['score'], 3), return_interval_text(best['interval']), "found for distance", round(best['threshold'], 4), "with linkage type", best['name'])
+    report(quiet, "Number of new clusters:", len(list(set(best['labels']))))
+    # every fix gets the label of its point
+    return best['labels'][inverse]
+
+########################################################################################################################################################################################################
+
+# cluster and select the best clustering for the provided data, using DBSCAN clustering
+# engine is 'reachability' or 'dbscan', see DBSCAN_ENGINE, the adaptive search needs the reachability engine
+# scoring, search, quiet, workers and cancelled are as in create_cluster_agglo, without an engine DBSCAN_ENGINE is used as it is set at the time of the call
+def create_cluster_dbscan (data, scoring=None, engine=None, search=None, session=None, index=None, quiet=False, workers=None, cancelled=None):
+  scoring = return_scoring_mode(scoring)
+  if engine is None:
+    engine = DBSCAN_ENGINE
+  if search is None:
+    search = SEARCH_MODE
+  stdev = 0.127
+  sd_threshold = stdev
+
+  max_dist, min_dist, avg_dist, median_dist = calculate_distances(data)
+
+  # determine initial distance thresholds
+  distances = []
+
+  steps = 15
+  step = (max_dist - min_dist) / steps
+
+  next_dist = min_dist + step
+  for i in range(5):
+    distances.append(next_dist)
+    next_dist += step
+
+  best = {'score': -2, 'interval': 0, 'labels': None, 'num_clusters': 0, 'threshold': 0, 'name': None}
+
+  prepared = prepare_points(data, session, index, quiet)
+  points, weights, inverse, distance_matrix, subset = prepared
+  # fixes that all fall into one grid cell (such as a bird sitting still) cannot be split
+  if len(points) < 2:
+    report(quiet, "All fixes fall into one point, they cannot be clustered")
+    return None
+  if is_sampled(scoring, len(points)):
+    report(quiet, "Scoring with a sampled silhouette score")
+
+  # perform and score the clusterings, the reachability tree is the single linkage tree and can be shared with the session
+  if engine == 'reachability':
+    check_cancelled(cancelled)
+    tree = return_session_tree(session, 'single', subset, distance_matrix, quiet)
+    if tree is None:
+      report(quiet, "Building reachability tree")
+      tree = return_reachability_tree(points, distance_matrix, quiet)
+      store_session_tree(session, 'single', subset, tree)
+  distance_matrix = complete_distance_matrix(points, distance_matrix, session, subset, quiet)
+  prepared = (points, weights, inverse, distance_matrix, subset)
+
+  if engine == 'reachability' and search == 'adaptive':
+    for dist, name, labels, score, interval in search_thresholds(distance_matrix, {'dbscan': tree}, 'reachability', scoring, False, weights, quiet, workers, cancelled):
+      select_best(best, dist, name, labels, score, interval, distance_matrix, False, weights, sd_threshold, quiet)
+  else:
+    # try each distance, with the reachability tree the number of clusters is known before scoring
+    if engine == 'reachability':
+      distances = np.linspace(distances[0], distances[-1], REACHABILITY_EPS_STEPS).tolist()
+      candidates = [(dist, [(engine, ('reachability', tree, dist), return_cluster_count(tree, dist, True))]) for dist in distances]
+    else:
+      candidates = [(dist, [(engine, ('dbscan', dist), None)]) for dist in distances]
+    sweep_candidates(distance_matrix, candidates, best, False, weights, scoring, sd_threshold, quiet, workers, cancelled)
+
+  if best['score'] == -2:
+    report(quiet, "Every attempt created only one cluster. Trying with agglomerative clustering")
+    labels = create_cluster_agglo(data, False, prepared, scoring, search, session, index, quiet, workers, cancelled)
+
+    return labels
+
+  report(quiet, "Best score of", round(best['score'], 3), return_interval_text(best['interval']), "found for esp =", round(best['threshold'], 4))
+  report(quiet, "Number of new clusters:", len(list(set(best['labels']))))
+  # every fix gets the label of its point
+  return best['labels'][inverse]
+
+########################################################################################################################################################################################################
+
+# start the initial clustering
+# with an interval (in minutes), the data is resampled to that interval first and the labels are copied back to all rows
+# with a session, the points, distances and trees are kept for the adjustments
+def start_initial_clustering (dataset, algorithm, penalty, interval=None, session=None):
+  sample = dataset
+  if interval is not None:
+    selected, mapping = resample_regular(dataset['timestamp'], interval * 60)
+    sample = dataset.iloc[selected]
+    print("Resampled", dataset.shape[0], "rows to", sample.shape[0], "rows at an interval of", interval, "minutes")
+
+  # prepare data
+  xy_data = sample[['location-long', 'location-lat']].to_numpy(dtype=np.float64)
+
+  # agglomerative clustering
+  if algorithm == 'agglo':
+    labels = create_cluster_agglo(xy_data, penalty, session=session, index=sample.index)
+  # DBSCAN clustering
+  elif algorithm == 'dbscan':
+    labels = create_cluster_dbscan (xy_data, session=session, index=sample.index)
+
+  if labels is not None:
+    # add labels to the data, each row gets the label of the fix that represents its interval
+    if interval is not None:
+      labels = np.asarray(labels)[mapping]
+    dataset['label'] = labels
+
+    return dataset
+  
+  print("Every attempt created only one cluster. No best clustering formation found. Please inspect your data.")
+  return None
+
+########################################################################################################################################################################################################
+
+# make an adjustment: recluster the given clusters
+# with the session of the initial clustering, its distances and trees are reused for the selected rows
+# returns the rows (positions) that get a new label and their new labels, see ClusteringState, or None if the clustering failed
+def adjust_reclustering(dataset, algorithm, clusters, penalty, session=None):
+  # select data with these clusters
+  selected = dataset['label'].isin(clusters).to_numpy()
+  data_recluster = dataset[selected]
+  original_labels = dataset['label'].to_numpy()[~selected]
+
+  # prepare data
+  xy_data = data_recluster[['location-long', 'location-lat']].to_numpy(dtype=np.float64)
+
+  # a reclustering of the same rows with the same settings is taken from the session cache
+  cached = False
+  if session is not None:
+    key = session.return_cache_key(data_recluster.index, algorithm, penalty)
+    cached, labels = session.lookup_reclustering(key)
+
+  if not cached:
+    # agglomerative clustering
+    if algorithm == 'agglo':
+      labels = create_cluster_agglo(xy_data, penalty, session=session, index=data_recluster.index)
+    # DBSCAN clustering
+    elif algorithm == 'dbscan':
+      labels = create_cluster_dbscan (xy_data, session=session, index=data_recluster.index)
+
+    if session is not None:
+      session.store_reclustering(key, labels)
+
+  # succesful clustering
+  if labels is not None:
+    # the new clusters get the labels that are not used by the other clusters
+    new_labels, labels = np.unique(labels, return_inverse=True)
+    new_label_indexes = fix_cluster_labels(np.unique(original_labels), new_labels)
+    reclustered_labels = new_label_indexes[labels]
+
+    return np.flatnonzero(selected), reclustered_labels
+  else:
+    print("Only 1 cluster created - clustering cancelled.")
+    return None
+
+########################################################################################################################################################################################################
+
+# make an adjustment: merge the given clusters into one cluster
+# returns the rows (positions) of the merged clusters, their new label and the remap of all labels, see ClusteringState
+def adjust_merge(dataset, clusters):
+  # select and merge data
+  new_cluster = min(clusters)
+  labels = dataset['label'].to_numpy()
+  selected = np.isin(labels, clusters)
+  merged_rows = np.flatnonzero(selected)
+  merged_labels = np.full(len(merged_rows), new_cluster)
+
+  # find new labels: the other clusters keep their order of first appearance and are numbered from 0, skipping the merged cluster
+  original_labels = labels[~selected]
+  original_data_labels, first_rows = np.unique(original_labels, return_index=True)
+  original_data_labels = original_data_labels[np.argsort(first_rows)]
+  new_label_indexes = np.delete(np.arange(len(original_data_labels) + 1), new_cluster)
+
+  # lookup array of old label -> new label
+  remap = np.full(labels.max() + 1, -1)
+  remap[original_data_labels] = new_label_indexes
+  remap[new_cluster] = new_cluster
+
+  return merged_rows, merged_labels, remap
@@ -0,0 +1,175 @@
+import os
+import glob
+
+import pandas as pd
+
+# source files and location of the partitioned data store
+SOURCE_FILES = ["full_data/O_VLIELAND-gps-" + str(year) + ".csv" for year in range(2016, 2022)]
+STORE_DIR = "full_data/store"
+STORE_MARKER = os.path.join(STORE_DIR, "import-complete")
+
+# rows per chunk when streaming a csv file, and the columns that are needed for preprocessing
+CHUNK_SIZE = 100000
+NEEDED_COLUMNS = ['event-id', 'timestamp', 'location-long', 'location-lat',
+                  'external-temperature', 'ground-speed', 'heading', 'height-above-msl',
+                  'year', 'month', 'day', 'animal-id', 'individual-local-identifier']
+
+# behaviour tag files, which are loaded once per session and indexed by individual
+TAG_COLUMNS = ['timestamp', 'individual-local-identifier', 'behavioural-classification']
+BEHAVIOUR_TAGS = {}
+
+########################################################################################################################################################################################################
+
+# returns the folder of the partition for the given animal id and year
+def return_partition_dir (animal_id, year):
+  return os.path.join(STORE_DIR, "animal-id=" + str(animal_id), "year=" + str(year))
+
+########################################################################################################################################################################################################
+
+# checks if the store exists and is not older than any of the source files
+def store_is_current ():
+  if not os.path.exists(STORE_MARKER):
+    return False
+
+  store_time = os.path.getmtime(STORE_MARKER)
+  for source_file in SOURCE_FILES:
+    if os.path.exists(source_file) and os.path.getmtime(source_file) > store_time:
+      return False
+  return True
+
+########################################################################################################################################################################################################
+
+# adds the animal-id and year columns that are used as partition keys
+def add_partition_columns (data):
+  if 'animal-id' not in data.columns:
+    data['animal-id'] = data['individual-local-identifier']
+  if 'year' not in data.columns:
+    data['year'] = pd.to_datetime(data['timestamp']).dt.year
+  return data
+
+########################################################################################################################################################################################################
+
+# writes the given data to its animal-id and year partitions, as one part per source file chunk
+def write_partitions (data, part_name):
+  for (animal_id, year), partition in data.groupby(['animal-id', 'year']):
+    partition_dir = return_partition_dir(animal_id, year)
+    os.makedirs(partition_dir, exist_ok=True)
+
+    filepath = os.path.join(partition_dir, part_name + ".parquet")
+    partition.to_parquet(filepath, index=False)
+
+########################################################################################################################################################################################################
+
+# one-time import: converts the source csv files into a columnar store partitioned by animal-id and year
+def import_source_data ():
+  print("Importing the source data into", STORE_DIR, "(this only happens once)")
+
+  # remove an outdated store
+  if os.path.exists(STORE_MARKER):
+    os.remove(STORE_MARKER)
+  if os.path.exists(STORE_DIR):
+    for filepath in glob.glob(os.path.join(STORE_DIR, "*", "*", "*.parquet")):
+      os.remove(filepath)
+  os.makedirs(STORE_DIR, exist_ok=True)
+
+  for source_file in SOURCE_FILES:
+    if not os.path.exists(source_file):
+      print("!Warning! Source file", source_file, "not found, skipped.")
+      continue
+
+    print("Importing", source_file)
+    source_name = os.path.splitext(os.path.basename(source_file))[0]
+    for i, chunk in enumerate(pd.read_csv(source_file, delimiter = ",", chunksize=CHUNK_SIZE)):
+      chunk = add_partition_columns(chunk)
+      write_partitions(chunk, source_name + "-" + str(i).zfill(4))
+
+  # mark the import as complete
+  with open(STORE_MARKER, "w") as marker:
+    marker.write("\n".join(SOURCE_FILES))
+  print("Import complete.\n")
+
+########################################################################################################################################################################################################
+
+# returns the data of one animal from the store as a dictionary of year -> data, importing the source files first if needed
+def read_animal_partitions (animal_id):
+  if not store_is_current():
+    import_source_data()
+
+  partitions = {}
+  animal_dir = os.path.join(STORE_DIR, "animal-id=" + str(animal_id))
+  for partition_dir in sorted(glob.glob(os.path.join(animal_dir, "year=*"))):
+    year = int(partition_dir.split("year=")[-1])
+    parts = [pd.read_parquet(filepath) for filepath in sorted(glob.glob(os.path.join(partition_dir, "*.parquet")))]
+    partitions[year] = pd.concat(parts, ignore_index=True)
+
+  if len(partitions) == 0:
+    print("No data found for", animal_id, "in", STORE_DIR)
+
+  return partitions
+
+########################################################################################################################################################################################################
+
+# reads a (custom) csv file in chunks and returns the data of the given animals as a dictionary of animal id -> year -> data
+# only the needed columns and the rows of these animals are kept, so memory use depends on the chunk size and not the file size
+def stream_animal_partitions (data_file, animal_ids, chunksize=CHUNK_SIZE):
+  year_chunks = {animal_id: {} for animal_id in animal_ids}
+
+  reader = pd.read_csv(data_file, delimiter = ",", usecols=lambda column: column in NEEDED_COLUMNS, chunksize=chunksize)
+  for chunk in reader:
+    if 'animal-id' in chunk.columns:
+      chunk = chunk[chunk['animal-id'].isin(animal_ids)]
+    else:
+      chunk = chunk[chunk['individual-local-identifier'].isin(animal_ids)]
+
+    if chunk.shape[0] == 0:
+      continue
+
+    # send the rows to their animal and year partition
+    chunk = add_partition_columns(chunk.copy())
+    for (animal_id, year), rows in chunk.groupby(['animal-id', 'year']):
+      year_chunks[animal_id].setdefault(year, []).append(rows)
+
+  all_partitions = {}
+  for animal_id in animal_ids:
+    partitions = {}
+    for year in sorted(year_chunks[animal_id].keys()):
+      partitions[year] = pd.concat(year_chunks[animal_id].pop(year), ignore_index=True)
+
+    if len(partitions) == 0:
+      print("No data found for", animal_id, "in", data_file)
+    all_partitions[animal_id] = partitions
+
+  return all_partitions
+
+########################################################################################################################################################################################################
+
+def return_tags_filepath (year):
+  return "full_data/O_VLIELAND-accessory-measurements-" + str(year) + ".csv"
+
+########################################################################################################################################################################################################
+
+# returns the behaviour tags of the given year as a dictionary of individual -> tags sorted by timestamp
+# each tag file is only read once per session
+def load_behaviour_tags (year):
+  if year not in BEHAVIOUR_TAGS:
+    tags_file = return_tags_filepath(year)
+
+    if not os.path.exists(tags_file):
+      print("No behaviour tag file found at", tags_file)
+      BEHAVIOUR_TAGS[year] = {}
+    else:
+      print("Reading behaviour tags from", tags_file)
+      tags = pd.read_csv(tags_file, delimiter = ",", usecols=TAG_COLUMNS)
+      tags['timestamp'] = pd.to_datetime(tags['timestamp'])
+      tags = tags.sort_values(by=['timestamp'], kind='stable')
+
+      BEHAVIOUR_TAGS[year] = {individual: indv_tags[['timestamp', 'behavioural-classification']].reset_index(drop=True)
+                              for individual, indv_tags in tags.groupby('individual-local-identifier')}
+
+  return BEHAVIOUR_TAGS[year]
+
+########################################################################################################################################################################################################
+
+# returns the behaviour tags of one individual for the given year, or None if there are none
+def return_individual_tags (individual, year):
+  return load_behaviour_tags(year).get(individual)
@@ -1,425 +1,859 @@
-from code.individual import Individual
-from code.utils import create_basic_scatter
-from code.database import add_database_entry
-
-import astral
-from astral.sun import sun
-from datetime import datetime
-import pytz
-
-import os
-import shutil
-
-import pandas as pd
-from shapely.geometry import Point
-from shapely.geometry.polygon import Polygon
-
-########################################################################################################################################################################################################
-
-def create_polygon (coords):
-  min_long = coords[0]
-  max_long = coords[1]
-  min_lat = coords[2]
-  max_lat = coords[3]
-
-  poly = Polygon([
-      (max_lat, min_long),
-      (max_lat, max_long),
-      (min_lat, max_long),
-      (min_lat, min_long)
-  ])
-  return poly
-
-########################################################################################################################################################################################################
-
-# takes the data from february to july and excludes any data outside the selected habitat
-# keeps track of trips consisting of > 1 point outside the habitat, after arriving
-def keep_area_data (data, filepath, coords):
-  rows_start = data.shape[0]
-
-  start = False
-  end = False
-
-  outside_data = pd.DataFrame(columns=['location-lat', 'location-long', 'timestamp'])
-
-  poly = create_polygon(coords)
-  for index, row in data.iterrows():
-    point = Point(row['location-lat'], row['location-long'])
-    check = poly.contains(point)
-
-    # point outside habitat
-    if not check:
-      new_row = row[["location-lat", "location-long", "timestamp"]]
-      outside_data = pd.concat([outside_data, new_row.to_frame().T], ignore_index=True)
-
-      data.drop(index, inplace=True)
-
-      if not start:
-        start = row['timestamp']
-        end = row['timestamp']
-      if start:
-        end = row['timestamp']
-
-    # just arrived inside habitat
-    if check:
-      if start != end:
-        print("Entering area. Away from", start, "to", end)
-      start = False
-      end = False
-
-  # if there is data left
-  if data.shape[0] > 0:
-    # end of data reached
-    if start:
-      print("Left area and did not return. Away from", start, "to", end, "\n")
-      start = False
-      end = False
-
-    data.reset_index(inplace=True)
-    rows_end = data.shape[0]
-    print("Rows before:", rows_start, "row now: ", rows_end, " | Rows deleted:", rows_start-rows_end)
-    print("Start date:", data['timestamp'].iloc[0])
-    print("End date:", data['timestamp'].iloc[-1])
-
-    # export data, leave out irrelevant columns
-    data = data[[ 'event-id', 'timestamp', 'location-long', 'location-lat',
-                  'external-temperature', 'ground-speed', 'heading', 'height-above-msl',
-                  'year', 'month', 'day', 'animal-id']]
-
-    print("File location:", filepath)
-    print("Exporting file...\n")
-    data.to_csv(filepath, sep=",", index=False)
-
-    return outside_data, True
-  # if there is no data in the breeding habitat for this year
-  else:
-    print("This year has no data in the breeding territory. Cancelled.")
-    return outside_data, False
-
-########################################################################################################################################################################################################
-
-def create_file_dir (animal_id, year):
-  main_dir = "individuals/"
-  individual_dir = main_dir + str(animal_id) + "_" + str(year) + "_"
-
-  i = 1
-  # check which index to use
-  while True:
-    check_dir = individual_dir + str(i)
-    # if current index is not in use
-    if not os.path.exists(check_dir):
-      # create main folder
-      individual_dir = check_dir
-      os.makedirs(individual_dir)
-
-      # create data folder
-      data_dir = individual_dir + "/data"
-      os.makedirs(data_dir)
-
-      # create plot folder
-      plot_dir = individual_dir + "/plots"
-      os.makedirs(plot_dir)
-
-      return i
-
-    # otherwise check the next one
-    else:
-      i += 1
-
-########################################################################################################################################################################################################
-
-def remove_file_dir (indv_object):
-    dir = indv_object.return_base_dir()
-    shutil.rmtree(dir)
-
-########################################################################################################################################################################################################
-
-def create_breeding_dataset (animal_id, coords, data_file):
-  print("Reading csv file...")
-  # load vlieland data
-  if data_file == 'vlieland':
-    gps_2016_vlieland = pd.read_csv("full_data/O_VLIELAND-gps-2016.csv", delimiter = ",")
-    gps_2017_vlieland = pd.read_csv("full_data/O_VLIELAND-gps-2017.csv", delimiter = ",")
-    gps_2018_vlieland = pd.read_csv("full_data/O_VLIELAND-gps-2018.csv", delimiter = ",")
-    gps_2019_vlieland = pd.read_csv("full_data/O_VLIELAND-gps-2019.csv", delimiter = ",")
-    gps_2020_vlieland = pd.read_csv("full_data/O_VLIELAND-gps-2020.csv", delimiter = ",")
-    gps_2021_vlieland = pd.read_csv("full_data/O_VLIELAND-gps-2021.csv", delimiter = ",")
-
-    all_years = [gps_2016_vlieland, gps_2017_vlieland, gps_2018_vlieland, gps_2019_vlieland, gps_2020_vlieland, gps_2021_vlieland]
-    vlieland_data = pd.concat(all_years)
-
-  # load custom data
-  else:
-    vlieland_data = pd.read_csv(data_file, delimiter = ",")
-
-  if 'animal-id' not in vlieland_data.columns:
-    vlieland_data['animal-id'] = vlieland_data['individual-local-identifier']
-
-  print("preparing to create breeding dataset")
-  individual_data = vlieland_data.copy()
-
-  # retrieve individual's data
-  individual_data = individual_data[individual_data['animal-id'] == animal_id]
-  individual_data.reset_index(inplace=True)
-  individual_data['timestamp'] = pd.to_datetime(individual_data['timestamp'])
-
-  if 'year' not in individual_data.columns:
-    individual_data['year'] = individual_data['timestamp'].dt.year
-  if 'month' not in individual_data.columns:
-    individual_data['month'] = individual_data['timestamp'].dt.month
-  if 'day' not in individual_data.columns:
-    individual_data['day'] = individual_data['timestamp'].dt.day
-
-  years = list(set(individual_data['year'].tolist()))
-  print("Years with data:", years)
-  indexes = []
-
-  years_with_data = []
-
-  for year in years:
-    # retrieve data for this year
-    print("============================================================")
-    print(animal_id, "|", year)
-    individual_data_yr = individual_data.copy()
-    individual_data_yr = individual_data_yr[individual_data_yr['year'] == year]
-
-    # create file directory
-    individual_index = create_file_dir(animal_id, year)
-    indexes.append(individual_index)
-
-    # exclude data outside of area
-    indv_object = Individual(animal_id, year, individual_index)
-    filepath = indv_object.return_data_filepath("processed")
-    outside_data, export = keep_area_data(individual_data_yr, filepath, coords)
-
-    if export:
-      input_list = [animal_id, year, coords[0], coords[1], coords[2], coords[3]]
-      add_database_entry(input_list, False)
-
-      filepath = indv_object.return_data_filepath("excluded")
-      outside_data.to_csv(filepath, sep=",", index=False)
-      years_with_data.append(year)
-    else:
-      remove_file_dir(indv_object)
-
-  # for use later
-  return years_with_data, indexes
-
-########################################################################################################################################################################################################
-
-def separate_day_night (data, filepath):
-  print("Preparing to add daytime column")
-  print("Size of original data file:", data.shape[0])
-
-  data['daytime'] = False
-
-  # for each point, check if daytime
-  for index, row in data.iterrows():
-    # create observer
-    loc = astral.Observer(row['location-lat'], row['location-long'], row['height-above-msl'])
-    timezone = pytz.timezone("Europe/Amsterdam")
-
-    # convert to datetime
-    row['timestamp'] = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
-
-    # get sunrise and sunset times
-    sunrise = (astral.sun.sunrise(loc, row['timestamp'].date(), timezone)).time()
-    sunset = (astral.sun.sunset(loc, row['timestamp'].date(), timezone)).time()
-
-    current_time = row['timestamp'].time()
-
-    # check if day
-    if sunrise < current_time < sunset:
-      data.at[index, 'daytime'] = True
-
-  # separate by day and night
-  day = data[data['daytime'] == True].copy()
-  night = data[data['daytime'] == False].copy()
-
-  print("Size of daytime data file:", day.shape[0])
-  print("Size of nighttime data file:", night.shape[0])
-
-  # overwrite datafile with day/night data
-  print("Exporting file...\n")
-  data.to_csv(filepath, sep = ",", index=False)
-
-  # for use later
-  return data
-
-########################################################################################################################################################################################################
-
-def add_behaviours (gps_data, filepath, individual, year):
-  print("Preparing to add behaviour tags")
-  print("Original file size:", gps_data.shape[0])
-  # read tag file
-  tags_file = "full_data/O_VLIELAND-accessory-measurements-" + str(year) + ".csv"
-  tags = pd.read_csv(tags_file, delimiter = ",")
-
-  # check if there is data available
-  if not individual in tags['individual-local-identifier'].unique():
-    print("No behaviour tags found for", str(individual), "in", str(year))
-    print("Operation cancelled.")
-    return
-
-  # grab individual tags
-  indv_tag_data = tags.copy()
-  indv_tag_data = indv_tag_data[indv_tag_data['individual-local-identifier'] == individual]
-
-  incomplete = False
-  # are there enough tags?
-  if gps_data.shape[0] > indv_tag_data.shape[0]:
-    print("!! The GPS data contains", gps_data.shape[0], "rows while the tag data contains", indv_tag_data.shape[0], "rows.")
-    print("!! The behaviour tags may be incomplete.")
-    incomplete = True
-
-  # convert timestamps to leave out seconds, for merging
-  indv_tag_data['timestamp'] = pd.to_datetime(indv_tag_data['timestamp'])
-  indv_tag_data['timestamp'] = indv_tag_data['timestamp'].round("min")
-
-  gps_data['timestamp'] = pd.to_datetime(gps_data['timestamp'])
-  gps_data['timestamp'] = gps_data['timestamp'].round("min")
-  #gps_data['timestamp'] = gps_data['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
-
-  # merge on gps data
-  tagged_gps_data = gps_data.merge(indv_tag_data, on='timestamp', how='left')
-
-  # remove columns we don't need
-  data = tagged_gps_data[['event-id_x', 'timestamp', 'location-long', 'location-lat',
-       'external-temperature', 'ground-speed', 'heading', 'height-above-msl',
-       'year', 'month', 'day', 'animal-id', 'daytime', 'behavioural-classification']].copy()
-  data.rename(columns={"event-id_x": "event-id"}, inplace=True)
-
-  # drop possible duplicate rows
-  data.drop_duplicates(inplace=True)
-  print("New file size:", tagged_gps_data.shape[0])
-
-  # check if nan values for behaviour
-  print("!! There are", data['behavioural-classification'].isna().sum(), "behaviour tags missing.")
-
-  # export data
-  print("Exporting file...\n")
-  data.to_csv(filepath, sep = ",", index=False)
-
-########################################################################################################################################################################################################
-
-
-def start_preprocessing():
-  while True:
-    print("In order to add a new individual's dataset to the database, we need the following information:")
-    print("animal id, minimum longitude, maximum longitude, minimum latitude, maximum latitude")
-    print("The longitude and latitude coordinates should correspond to those of the map image, which should be located in the maps folder.")
-    print("(Type 'exit' to return to the main menu)")
-
-    user_input = input(">>> ")
-    os.system('cls')
-
-    if user_input == 'exit': return
-
-    split_parts = user_input.split(",")
-    input_list = []
-      
-    # check each input
-    for part in split_parts:
-      item = part.strip()
-      # check if integer
-      try:
-        item = float(item)
-      except ValueError: 
-        print("ERROR: ", item, "is not a valid float.")
-        break
-      input_list.append(item)
-    if len(input_list) != 5:
-      print("ERROR: You did not provide all necessary data.\n")
-    else:
-      break
-
-  aspect = 1.64
-  input_list[0] = int(input_list[0])
-
-  while True:
-    print("Presss enter to use the Vlieland data, or enter the path to the csv file you wish to use. If it is in the full_data folder, the path will be full_data/your_data.csv")
-    user_input = input(">>> ")
-
-    if len(user_input) == 0:
-      data_file = 'vlieland'
-      break
-
-    elif os.path.exists(user_input):
-      data_file = user_input
-      break
-    else:
-      print("File not found")
-
-  ####################################################
-
-  print("The following data has been entered.")
-  print("Animal id to be preprocessed:", input_list[0])
-  print("Coordinates:", input_list[1], input_list[2], input_list[3], input_list[4])
-  print("Data:", data_file)
-
-  print("Do you want to continue? Press enter. Otherwise, type 'exit' to return to the main menu.")
-  user_input = input(">>> ")
-
-  if user_input == 'exit':
-    return
-
-  animal_id = input_list[0]
-  min_long = input_list[1]
-  max_long = input_list[2]
-  min_lat = input_list[3]
-  max_lat = input_list[4]
-
-  coords = [min_long, max_long, min_lat, max_lat]
-
-  # remove data outside of habitat for all years -> separate into years
-  years, indexes = create_breeding_dataset(animal_id, coords, data_file)
-
-  if years is None:
-    return
-
-  # for each year of this individual
-  for year, i in zip(years, indexes):
-    indv_object = Individual(animal_id, year, i)
-    indv_object.load_individual_data()
-    filepath = indv_object.return_data_filepath("processed")
-
-    print("\n=======================================================================")
-    print("Current year:", year)
-
-    # load current data for this year
-    data = pd.read_csv(filepath, delimiter = ",")
-
-    # add column to indicate daytime
-    data = separate_day_night(data, filepath)
-
-    # add behaviour tags
-    add_behaviours(data, filepath, animal_id, year)
-
-  print("Finished pre-processing data")
-  print("Creating plots..")
-
-  # create basic scatter plots
-  for year, i in zip(years,indexes):
-    # read data
-    indv_object = Individual(animal_id, year, i)
-    indv_object.load_individual_data()
-    filepath = indv_object.return_data_filepath("processed")
-
-    data = pd.read_csv(filepath, delimiter = ",")
-
-    data = data[~data['timestamp'].duplicated()]
-
-    title = "raw data"
-    x, y, box, aspect, map, filepath = indv_object.return_plot_parameters(data, title)
-
-    while True:
-      if not os.path.exists(map):
-        print("No map image found at", map)
-        print("Please provide one, then press enter")
-
-        _ = input()
-      else:
-        break
-
-    # create plot
-    create_basic_scatter(x, y, box, aspect, map, filepath, None, None, None, None, True)
\ No newline at end of file
+from code.individual import Individual
+from code.utils import create_basic_scatter, haversine_distance
+from code.database import add_database_entry, input_animal_id, save_ingest_state, load_ingest_state
+from code.storage import data_exists, read_last_rows, write_data, append_data
+from code.ingest import read_animal_partitions, stream_animal_partitions, return_individual_tags
+
+import astral
+from astral.sun import sun
+import pytz
+
+import os
+import io
+import shutil
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Point
+from shapely.geometry.polygon import Polygon
+
+# daytime is determined per date and location cell (rounded coordinates and elevation)
+# points within the margin (in seconds) of sunrise or sunset are checked with their exact location
+DAYTIME_CELL_DECIMALS = 2
+DAYTIME_ELEVATION_STEP = 10
+DAYTIME_MARGIN = 300
+
+# maximum time difference between a gps point and its behaviour tag
+BEHAVIOUR_TOLERANCE = pd.Timedelta(minutes=1)
+
+# a fix is an outlier if the implied speed (m/s) towards it and away from it are both above the maximum
+MAX_SPEED = 30
+
+########################################################################################################################################################################################################
+
+def create_polygon (coords):
+  min_long = coords[0]
+  max_long = coords[1]
+  min_lat = coords[2]
+  max_lat = coords[3]
+
+  poly = Polygon([
+      (max_lat, min_long),
+      (max_lat, max_long),
+      (min_lat, max_long),
+      (min_lat, min_long)
+  ])
+  return poly
+
+########################################################################################################################################################################################################
+
+# returns a boolean mask of the points that lie inside the selected habitat, in one call
+def return_habitat_mask (data, coords):
+  poly = create_polygon(coords)
+  return shapely.contains_xy(poly, data['location-lat'].values, data['location-long'].values)
+
+########################################################################################################################################################################################################
+
+# returns a table of the trips consisting of > 1 point outside the habitat, based on run-lengths of the habitat mask
+# open_run is the (start, end, fixes) of a trip that was still going on at the end of the earlier data, which the first run continues
+def return_excursions (timestamps, inside, open_run=None):
+  outside = ~np.asarray(inside, dtype=bool)
+  timestamps = np.asarray(timestamps)
+
+  # run starts and ends of consecutive points outside the habitat
+  padded = np.concatenate(([False], outside, [False]))
+  changes = np.flatnonzero(padded[1:] != padded[:-1])
+  run_starts = changes[::2]
+  run_ends = changes[1::2] - 1
+
+  excursions = pd.DataFrame({
+    'start': timestamps[run_starts],
+    'end': timestamps[run_ends],
+    'fixes': run_ends - run_starts + 1,
+    'returned': run_ends < len(outside) - 1
+  })
+
+  if open_run is not None:
+    start, end, fixes = open_run
+    if len(outside) > 0 and outside[0]:
+      excursions.loc[0, 'start'] = start
+      excursions.loc[0, 'fixes'] += fixes
+    else:
+      excursions = pd.concat([pd.DataFrame({'start': [start], 'end': [end], 'fixes': [fixes], 'returned': [True]}), excursions], ignore_index=True)
+
+  # only keep trips with different start and end times
+  excursions = excursions[excursions['start'] != excursions['end']].reset_index(drop=True)
+  return excursions
+
+########################################################################################################################################################################################################
+
+# takes the data from february to july and excludes any data outside the selected habitat
+# keeps track of trips consisting of > 1 point outside the habitat, after arriving
+# open_run is a trip that was still going on at the end of the earlier data, see return_excursions
+def keep_area_data (data, coords, vectorized=True, open_run=None):
+  if not vectorized:
+    data, outside_data, export = keep_area_data_per_row(data, coords)
+    return data, outside_data, None, export
+
+  rows_start = data.shape[0]
+
+  inside = return_habitat_mask(data, coords)
+  excursions = return_excursions(data['timestamp'].values, inside, open_run)
+
+  outside_data = data.loc[~inside, ['location-lat', 'location-long', 'timestamp']].reset_index(drop=True)
+  data = data[inside]
+
+  # if there is data left
+  if data.shape[0] > 0:
+    print("Trips away from the area:", excursions.shape[0])
+    if excursions.shape[0] > 0 and not excursions['returned'].iloc[-1]:
+      print("Left area and did not return. Away from", excursions['start'].iloc[-1], "to", excursions['end'].iloc[-1])
+
+    data = data.reset_index()
+    rows_end = data.shape[0]
+    print("Rows before:", rows_start, "row now: ", rows_end, " | Rows deleted:", rows_start-rows_end)
+    print("Start date:", data['timestamp'].iloc[0])
+    print("End date:", data['timestamp'].iloc[-1])
+
+    # leave out irrelevant columns
+    data = data[[ 'event-id', 'timestamp', 'location-long', 'location-lat',
+                  'external-temperature', 'ground-speed', 'heading', 'height-above-msl',
+                  'year', 'month', 'day', 'animal-id']]
+
+    return data, outside_data, excursions, True
+  # if there is no data in the breeding habitat for this year
+  else:
+    print("This year has no data in the breeding territory. Cancelled.")
+    return data, outside_data, excursions, False
+
+########################################################################################################################################################################################################
+
+# original version of keep_area_data that checks each point separately
+def keep_area_data_per_row (data, coords):
+  rows_start = data.shape[0]
+
+  start = False
+  end = False
+
+  outside_data = pd.DataFrame(columns=['location-lat', 'location-long', 'timestamp'])
+
+  poly = create_polygon(coords)
+  for index, row in data.iterrows():
+    point = Point(row['location-lat'], row['location-long'])
+    check = poly.contains(point)
+
+    # point outside habitat
+    if not check:
+      new_row = row[["location-lat", "location-long", "timestamp"]]
+      outside_data = pd.concat([outside_data, new_row.to_frame().T], ignore_index=True)
+
+      data.drop(index, inplace=True)
+
+      if not start:
+        start = row['timestamp']
+        end = row['timestamp']
+      if start:
+        end = row['timestamp']
+
+    # just arrived inside habitat
+    if check:
+      if start != end:
+        print("Entering area. Away from", start, "to", end)
+      start = False
+      end = False
+
+  # if there is data left
+  if data.shape[0] > 0:
+    # end of data reached
+    if start:
+      print("Left area and did not return. Away from", start, "to", end, "\n")
+      start = False
+      end = False
+
+    data.reset_index(inplace=True)
+    rows_end = data.shape[0]
+    print("Rows before:", rows_start, "row now: ", rows_end, " | Rows deleted:", rows_start-rows_end)
+    print("Start date:", data['timestamp'].iloc[0])
+    print("End date:", data['timestamp'].iloc[-1])
+
+    # leave out irrelevant columns
+    data = data[[ 'event-id', 'timestamp', 'location-long', 'location-lat',
+                  'external-temperature', 'ground-speed', 'heading', 'height-above-msl',
+                  'year', 'month', 'day', 'animal-id']]
+
+    return data, outside_data, True
+  # if there is no data in the breeding habitat for this year
+  else:
+    print("This year has no data in the breeding territory. Cancelled.")
+    return data, outside_data, False
+
+########################################################################################################################################################################################################
+
+def create_file_dir (animal_id, year):
+  main_dir = "individuals/"
+  individual_dir = main_dir + str(animal_id) + "_" + str(year) + "_"
+
+  i = 1
+  # check which index to use
+  while True:
+    check_dir = individual_dir + str(i)
+    # if current index is not in use
+    if not os.path.exists(check_dir):
+      # create main folder
+      individual_dir = check_dir
+      os.makedirs(individual_dir)
+
+      # create data folder
+      data_dir = individual_dir + "/data"
+      os.makedirs(data_dir)
+
+      # create plot folder
+      plot_dir = individual_dir + "/plots"
+      os.makedirs(plot_dir)
+
+      return i
+
+    # otherwise check the next one
+    else:
+      i += 1
+
+########################################################################################################################################################################################################
+
+def remove_file_dir (indv_object):
+    dir = indv_object.return_base_dir()
+    shutil.rmtree(dir)
+
+########################################################################################################################################################################################################
+
+def create_breeding_dataset (animal_id, coords, data_file, show_timings=False):
+  # load vlieland data, only the partitions of this individual
+  if data_file == 'vlieland':
+    print("Reading data store...")
+    partitions = read_animal_partitions(animal_id)
+
+  # load custom data, streamed in chunks
+  else:
+    print("Reading csv file...")
+    partitions = stream_animal_partitions(data_file, [animal_id])[animal_id]
+
+  if len(partitions) == 0:
+    return None, None, None
+
+  print("preparing to create breeding dataset")
+  years = list(partitions.keys())
+  print("Years with data:", years)
+  indexes = []
+
+  years_with_data = []
+  processed_data = []
+
+  for year in years:
+    # retrieve data for this year
+    print("============================================================")
+    print(animal_id, "|", year)
+
+    # run all preprocessing steps in memory
+    timings = {} if show_timings else None
+    data, outside_data, excursions, quality, export = run_preprocessing(partitions.pop(year), animal_id, year, coords, timings)
+
+    if export:
+      individual_index = save_preprocessed_data(animal_id, year, coords, data, outside_data, excursions, quality)
+      indexes.append(individual_index)
+      years_with_data.append(year)
+      processed_data.append(data)
+
+  # for use later
+  return years_with_data, indexes, processed_data
+
+########################################################################################################################################################################################################
+
+# runs the preprocessing of one animal-year in a worker process and returns what it printed along with its results
+# the parent prints the output of each animal-year in order, so the output of the workers does not interleave
+def run_batch_preprocessing (*args):
+  output = io.StringIO()
+  with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+    result = run_preprocessing(*args)
+  return output.getvalue(), result
+
+########################################################################################################################################################################################################
+
+# preprocesses several animals at once: the source data is read once and each animal-year runs in a process pool
+# animals is a list of [animal id, coords] pairs
+def preprocess_batch (animals, data_file, workers=None, show_timings=False):
+  animal_ids = [animal_id for animal_id, _ in animals]
+
+  # read the source data once
+  if data_file == 'vlieland':
+    print("Reading data store...")
+    all_partitions = {animal_id: read_animal_partitions(animal_id) for animal_id in animal_ids}
+  else:
+    print("Reading csv file...")
+    all_partitions = stream_animal_partitions(data_file, animal_ids)
+
+  results = [([], [], []) for _ in animals]
+  workers = workers or os.cpu_count() or 1
+
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    tasks = []
+    for i, (animal_id, coords) in enumerate(animals):
+      partitions = all_partitions[animal_id]
+      for year in partitions.keys():
+        timings = {} if show_timings else None
+        # the tags are looked up here, so the tag file is only read once and not in every worker
+        tags = return_individual_tags(animal_id, year)
+        if tags is None:
+          tags = pd.DataFrame(columns=['timestamp', 'behavioural-classification'])
+        future = executor.submit(run_batch_preprocessing, partitions[year].copy(), animal_id, year, coords, timings, tags)
+        tasks.append((i, animal_id, year, coords, future))
+    all_partitions = None
+
+    print("Preprocessing", len(tasks), "animal-years with", workers, "workers")
+
+    # folders and database entries are created one at a time, so each animal-year receives its own index
+    for i, animal_id, year, coords, future in tasks:
+      output, (data, outside_data, excursions, quality, export) = future.result()
+      print("============================================================")
+      print(animal_id, "|", year)
+      print(output, end="")
+
+      if export:
+        individual_index = save_preprocessed_data(animal_id, year, coords, data, outside_data, excursions, quality)
+        results[i][0].append(year)
+        results[i][1].append(individual_index)
+        results[i][2].append(data)
+
+  return results
+
+########################################################################################################################################################################################################
+
+# returns the sunrise and sunset time (in seconds since midnight) for a location and date, memoized in the given table
+def return_sun_times (lat, long, elevation, date, timezone, memo):
+  key = (date, lat, long, elevation)
+  if key not in memo:
+    loc = astral.Observer(lat, long, elevation)
+    sunrise = (astral.sun.sunrise(loc, date, timezone)).time()
+    sunset = (astral.sun.sunset(loc, date, timezone)).time()
+
+    memo[key] = (return_seconds(sunrise), return_seconds(sunset))
+  return memo[key]
+
+def return_seconds (time):
+  return time.hour * 3600 + time.minute * 60 + time.second + time.microsecond / 1e6
+
+########################################################################################################################################################################################################
+
+def separate_day_night (data):
+  print("Preparing to add daytime column")
+  print("Size of original data file:", data.shape[0])
+
+  timezone = pytz.timezone("Europe/Amsterdam")
+  memo = {}
+
+  timestamps = pd.to_datetime(data['timestamp'])
+  dates = timestamps.dt.date.values
+  current_time = (timestamps - timestamps.dt.normalize()).dt.total_seconds().values
+
+  lat = data['location-lat'].values
+  long = data['location-long'].values
+  elevation = data['height-above-msl'].values
+
+  # sunrise and sunset are computed once per date and location cell
+  # (astral ignores elevations below zero)
+  cells = pd.DataFrame({
+    'date': dates,
+    'lat': np.round(lat, DAYTIME_CELL_DECIMALS),
+    'long': np.round(long, DAYTIME_CELL_DECIMALS),
+    'elevation': np.round(np.nan_to_num(elevation, nan=0).clip(min=0) / DAYTIME_ELEVATION_STEP) * DAYTIME_ELEVATION_STEP
+  })
+  cell_index = cells.groupby(list(cells.columns), sort=False).ngroup().values
+  unique_cells = cells.drop_duplicates()
+
+  cell_times = np.array([return_sun_times(cell.lat, cell.long, cell.elevation, cell.date, timezone, memo)
+                         for cell in unique_cells.itertuples(index=False)])
+  sunrise = cell_times[cell_index, 0]
+  sunset = cell_times[cell_index, 1]
+
+  # points close to sunrise or sunset are checked with their exact location
+  near = np.flatnonzero((np.abs(current_time - sunrise) < DAYTIME_MARGIN) | (np.abs(current_time - sunset) < DAYTIME_MARGIN))
+  for i in near:
+    sunrise[i], sunset[i] = return_sun_times(lat[i], long[i], elevation[i], dates[i], timezone, memo)
+
+  print("Sunrise and sunset computed for", len(memo), "locations and dates")
+
+  # check if day
+  data['daytime'] = (sunrise < current_time) & (current_time < sunset)
+
+  # separate by day and night
+  day = data[data['daytime'] == True].copy()
+  night = data[data['daytime'] == False].copy()
+
+  print("Size of daytime data file:", day.shape[0])
+  print("Size of nighttime data file:", night.shape[0], "\n")
+
+  # for use later
+  return data
+
+########################################################################################################################################################################################################
+
+def add_behaviours (gps_data, individual, year, indv_tag_data=None):
+  print("Preparing to add behaviour tags")
+  print("Original file size:", gps_data.shape[0])
+  # grab individual tags, the tag file is only read once per session
+  if indv_tag_data is None:
+    indv_tag_data = return_individual_tags(individual, year)
+
+  # check if there is data available
+  if indv_tag_data is None or indv_tag_data.shape[0] == 0:
+    print("No behaviour tags found for", str(individual), "in", str(year))
+    print("Operation cancelled.\n")
+    return gps_data
+
+  incomplete = False
+  # are there enough tags?
+  if gps_data.shape[0] > indv_tag_data.shape[0]:
+    print("!! The GPS data contains", gps_data.shape[0], "rows while the tag data contains", indv_tag_data.shape[0], "rows.")
+    print("!! The behaviour tags may be incomplete.")
+    incomplete = True
+
+  # merge each gps point with the nearest tag within the tolerance
+  gps_data = gps_data.sort_values(by=['timestamp'], kind='stable')
+  gps_data['timestamp'] = gps_data['timestamp'].astype('datetime64[ns]')
+  indv_tag_data = indv_tag_data.astype({'timestamp': 'datetime64[ns]'})
+
+  tagged_gps_data = pd.merge_asof(gps_data, indv_tag_data, on='timestamp', direction='nearest', tolerance=BEHAVIOUR_TOLERANCE)
+
+  # remove columns we don't need
+  data = tagged_gps_data[['event-id', 'timestamp', 'location-long', 'location-lat',
+       'external-temperature', 'ground-speed', 'heading', 'height-above-msl',
+       'year', 'month', 'day', 'animal-id', 'daytime', 'behavioural-classification']]
+  print("New file size:", tagged_gps_data.shape[0])
+
+  # check if nan values for behaviour
+  print("!! There are", data['behavioural-classification'].isna().sum(), "behaviour tags missing.\n")
+
+  return data
+
+########################################################################################################################################################################################################
+
+# returns the step distance (m), time delta (s) and implied speed (m/s) between consecutive fixes
+def return_steps (data):
+  lat = data['location-lat'].to_numpy(dtype=float)
+  long = data['location-long'].to_numpy(dtype=float)
+  seconds = data['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+
+  distance = haversine_distance(lat[:-1], long[:-1], lat[1:], long[1:])
+  delta = np.diff(seconds)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    speed = distance / delta
+
+  return distance, delta, speed
+
+########################################################################################################################################################################################################
+
+# removes duplicate rows and timestamps, and fixes that imply an impossible jump away and back (spikes)
+# previous are the last fixes of the earlier data, the last one is the neighbour of the first fix and is checked again on both sides
+# returns the cleaned data and a quality report of one row, whose attrs tell if the last earlier fix is an outlier
+def check_gps_quality (data, previous=None):
+  rows = data.shape[0]
+  data = data.sort_values(by=['timestamp'], kind='stable')
+
+  # duplicate rows, then duplicate timestamps (the first fix is kept)
+  duplicate_rows = data.duplicated().to_numpy()
+  duplicate_timestamps = data['timestamp'].duplicated().to_numpy() & ~duplicate_rows
+  data = data[~(duplicate_rows | duplicate_timestamps)]
+
+  # speed towards and away from each fix, the first and last fix only have one side
+  steps = data
+  if previous is not None and data.shape[0] > 0:
+    steps = pd.concat([previous[['timestamp', 'location-long', 'location-lat']], data[['timestamp', 'location-long', 'location-lat']]], ignore_index=True)
+  distance, delta, speed = return_steps(steps)
+  speed_in = np.concatenate(([0], speed))
+  speed_out = np.concatenate((speed, [0]))
+  outliers = (speed_in > MAX_SPEED) & (speed_out > MAX_SPEED)
+
+  previous_outlier = False
+  if steps is not data:
+    previous_outlier = previous.shape[0] > 1 and bool(outliers[previous.shape[0] - 1])
+    outliers = outliers[previous.shape[0]:]
+  data = data[~outliers].reset_index(drop=True)
+
+  distance, delta, speed = return_steps(data)
+  report = pd.DataFrame({
+    'first-timestamp': [data['timestamp'].min()],
+    'last-timestamp': [data['timestamp'].max()],
+    'rows': [rows],
+    'duplicate-rows': [int(duplicate_rows.sum())],
+    'duplicate-timestamps': [int(duplicate_timestamps.sum())],
+    'outliers': [int(outliers.sum())],
+    'rows-kept': [data.shape[0]],
+    'median-interval': [np.median(delta) if len(delta) > 0 else np.nan],
+    'max-speed': [np.max(speed) if len(speed) > 0 else np.nan],
+    'total-distance': [np.sum(distance)]
+  })
+
+  report.attrs['previous-outlier'] = previous_outlier
+  if previous_outlier:
+    print("The last fix of the earlier data is an outlier.")
+  print("Removed", report.at[0, 'duplicate-rows'], "duplicate rows,", report.at[0, 'duplicate-timestamps'], "duplicate timestamps and", report.at[0, 'outliers'], "outliers.\n")
+
+  return data, report
+
+########################################################################################################################################################################################################
+
+# runs a single preprocessing stage, keeping track of its duration if timings is a dictionary
+def run_stage (name, timings, function, *args):
+  start = time.perf_counter()
+  result = function(*args)
+  if timings is not None:
+    timings[name] = time.perf_counter() - start
+  return result
+
+########################################################################################################################################################################################################
+
+# runs all preprocessing stages on the data of one animal-year in memory:
+# habitat filter -> daytime -> behaviour tags -> quality (duplicates and outliers)
+# tags are the behaviour tags of this animal-year, which are looked up if not given
+# new data of an animal-year continues the stored data: previous are its last fixes and open_run its unfinished trip, if any
+def run_preprocessing (data, animal_id, year, coords, timings=None, tags=None, previous=None, open_run=None):
+  data = add_date_columns(data)
+  data, outside_data, excursions, export = run_stage("habitat", timings, keep_area_data, data, coords, True, open_run)
+  quality = None
+
+  if export:
+    data = run_stage("daytime", timings, separate_day_night, data)
+    data = run_stage("behaviours", timings, add_behaviours, data, animal_id, year, tags)
+    data, quality = run_stage("quality", timings, check_gps_quality, data, previous)
+
+  if timings is not None:
+    print("Stage timings (s):", ", ".join(name + " " + str(round(duration, 2)) for name, duration in timings.items()))
+
+  return data, outside_data, excursions, quality, export
+
+########################################################################################################################################################################################################
+
+# converts the timestamps and adds the month and day columns if they are missing
+def add_date_columns (data):
+  data['timestamp'] = pd.to_datetime(data['timestamp'])
+
+  if 'month' not in data.columns:
+    data['month'] = data['timestamp'].dt.month
+  if 'day' not in data.columns:
+    data['day'] = data['timestamp'].dt.day
+
+  return data
+
+########################################################################################################################################################################################################
+
+# creates the folder and database entry for one preprocessed animal-year and exports its data, returns the index
+def save_preprocessed_data (animal_id, year, coords, data, outside_data, excursions, quality):
+  # create file directory
+  individual_index = create_file_dir(animal_id, year)
+
+  input_list = [animal_id, year, coords[0], coords[1], coords[2], coords[3]]
+  add_database_entry(input_list, False)
+
+  indv_object = Individual(animal_id, year, individual_index)
+  export_preprocessed_data(indv_object, data, outside_data, excursions, quality)
+  save_ingest_state(indv_object.db_id, return_last_timestamp(data, outside_data))
+
+  return individual_index
+
+########################################################################################################################################################################################################
+
+# returns the last timestamp of the raw data, which is split over the data inside and outside the habitat
+def return_last_timestamp (data, outside_data):
+  timestamps = pd.concat([pd.to_datetime(data['timestamp']), pd.to_datetime(outside_data['timestamp'])])
+  return timestamps.max()
+
+########################################################################################################################################################################################################
+
+# exports the preprocessed data of one animal-year, which is only written once
+def export_preprocessed_data (indv_object, data, outside_data, excursions, quality):
+  filepath = indv_object.return_data_filepath("processed")
+  print("File location:", filepath)
+  print("Exporting file...\n")
+  write_data(data, filepath)
+
+  filepath = indv_object.return_data_filepath("excluded")
+  outside_data.to_csv(filepath, sep=",", index=False)
+
+  if excursions is not None:
+    filepath = indv_object.return_data_filepath("excursions")
+    excursions.to_csv(filepath, sep=",", index=False)
+
+  filepath = indv_object.return_data_filepath("quality")
+  print("Quality report:", filepath)
+  quality.to_csv(filepath, sep=",", index=False)
+
+########################################################################################################################################################################################################
+
+
+# checks the input 'animal id, min long, max long, min lat, max lat', returns the values or None
+def parse_individual_input (user_input):
+  split_parts = user_input.split(",")
+  input_list = []
+
+  # check each input
+  for part in split_parts:
+    item = part.strip()
+    # check if integer
+    try:
+      item = float(item)
+    except ValueError:
+      print("ERROR: ", item, "is not a valid float.")
+      return None
+    input_list.append(item)
+  if len(input_list) != 5:
+    print("ERROR: You did not provide all necessary data.\n")
+    return None
+
+  input_list[0] = int(input_list[0])
+  return input_list
+
+########################################################################################################################################################################################################
+
+# asks which data file to use
+def input_data_file ():
+  while True:
+    print("Presss enter to use the Vlieland data, or enter the path to the csv file you wish to use. If it is in the full_data folder, the path will be full_data/your_data.csv")
+    user_input = input(">>> ")
+
+    if len(user_input) == 0:
+      return 'vlieland'
+    elif os.path.exists(user_input):
+      return user_input
+    else:
+      print("File not found")
+
+########################################################################################################################################################################################################
+
+# creates the basic scatter plots of the preprocessed data
+def create_raw_data_plots (animal_id, years, indexes, processed_data):
+  for year, i, data in zip(years, indexes, processed_data):
+    indv_object = Individual(animal_id, year, i)
+    indv_object.load_individual_data()
+
+    title = "raw data"
+    x, y, box, aspect, map, filepath = indv_object.return_plot_parameters(data, title)
+
+    while True:
+      if not os.path.exists(map):
+        print("No map image found at", map)
+        print("Please provide one, then press enter")
+
+        _ = input()
+      else:
+        break
+
+    # create plot
+    create_basic_scatter(x, y, box, aspect, map, filepath, None, None, None, None, True)
+
+########################################################################################################################################################################################################
+
+# preprocesses only the data that is newer than what was ingested before, and appends it to the existing files
+# the new rows are appended to the processed data, the quality and excursion stages continue from its last fixes and unfinished trip
+# an individual without processed data (such as one added to the database directly) gets all data of its year preprocessed
+def update_individual (indv_object, data_file, show_timings=False):
+  indv_object.load_individual_data()
+  animal_id = indv_object.animal_id
+  year = indv_object.year
+  coords = [indv_object.min_long, indv_object.max_long, indv_object.min_lat, indv_object.max_lat]
+  filepath = indv_object.return_data_filepath("processed")
+  stored = data_exists(filepath)
+
+  # load the data of this individual for this year
+  if data_file == 'vlieland':
+    print("Reading data store...")
+    partitions = read_animal_partitions(animal_id)
+  else:
+    print("Reading csv file...")
+    partitions = stream_animal_partitions(data_file, [animal_id])[animal_id]
+
+  if year not in partitions:
+    print("No data found for", animal_id, "in", year)
+    return False
+  data = add_date_columns(partitions[year])
+  timings = {} if show_timings else None
+
+  if not stored:
+    print("No processed data found, preprocessing all data of", year)
+    data, outside_data, excursions, quality, export = run_preprocessing(data, animal_id, year, coords, timings)
+    if not export:
+      return False
+    export_preprocessed_data(indv_object, data, outside_data, excursions, quality)
+    save_ingest_state(indv_object.db_id, return_last_timestamp(data, outside_data))
+    return True
+
+  # find how far ingestion got: the last processed fix, or a later fix outside the habitat
+  previous = read_last_rows(filepath, 2)
+  last_timestamp = previous['timestamp'].iloc[-1]
+  ingest_state = load_ingest_state(indv_object.db_id)
+  if ingest_state is not None:
+    last_timestamp = max(last_timestamp, pd.Timestamp(ingest_state))
+  print("Data has been ingested up to", last_timestamp)
+
+  new_data = data[data['timestamp'] > last_timestamp].reset_index(drop=True)
+  if new_data.shape[0] == 0:
+    print("No new data found after", last_timestamp)
+    return False
+  print("Found", new_data.shape[0], "new rows")
+
+  # a trip is still going on if the last fix was outside the habitat, it is the last stored trip if that already had more than one fix
+  excursions_path = indv_object.return_data_filepath("excursions")
+  stored_excursions = None
+  open_run = None
+  if last_timestamp > previous['timestamp'].iloc[-1]:
+    open_run = (last_timestamp, last_timestamp, 1)
+    if os.path.exists(excursions_path):
+      stored_excursions = pd.read_csv(excursions_path, parse_dates=['start', 'end'])
+      unfinished = stored_excursions[stored_excursions['end'] == last_timestamp]
+      if unfinished.shape[0] > 0:
+        open_run = (unfinished['start'].iloc[-1], last_timestamp, int(unfinished['fixes'].iloc[-1]))
+        stored_excursions = stored_excursions.drop(index=unfinished.index)
+
+  # only run the new rows through the preprocessing
+  data, outside_data, excursions, quality, export = run_preprocessing(new_data, animal_id, year, coords, timings, None, previous, open_run)
+
+  if export:
+    # the last processed fix is removed if it turns out to be an outlier, now that the fix after it is known
+    drop_last = 1 if quality.attrs['previous-outlier'] else 0
+    print("Appending", data.shape[0], "rows to", filepath)
+    append_data(data, filepath, drop_last)
+
+  for datatype, new_rows in [("excluded", outside_data), ("quality", quality)]:
+    if new_rows is not None and new_rows.shape[0] > 0:
+      filepath = indv_object.return_data_filepath(datatype)
+      new_rows.to_csv(filepath, sep=",", index=False, mode='a', header=not os.path.exists(filepath))
+
+  # the stored trip that continued is replaced, which rewrites the (small) table of trips
+  if stored_excursions is not None:
+    pd.concat([stored_excursions, excursions], ignore_index=True).to_csv(excursions_path, sep=",", index=False)
+  elif excursions is not None and excursions.shape[0] > 0:
+    excursions.to_csv(excursions_path, sep=",", index=False, mode='a', header=not os.path.exists(excursions_path))
+
+  # record how far ingestion got
+  last_timestamp = new_data['timestamp'].max()
+  save_ingest_state(indv_object.db_id, last_timestamp)
+  print("Data has now been ingested up to", last_timestamp)
+
+  return True
+
+########
+
+def start_update(show_timings=False):
+  while True:
+    print("Select the individual instance to add new data to. Provide the animal id of the individual.")
+    print("Or type 'show' to show a list of all available animal ids.")
+    entries, user_input = input_animal_id(True)
+
+    if entries is not None:
+      break
+    if entries is None and user_input:
+      return
+
+  indv_list = entries[user_input]
+  indv_object = Individual(indv_list[0], indv_list[1], indv_list[2])
+
+  data_file = input_data_file()
+  update_individual(indv_object, data_file, show_timings)
+
+########################################################################################################################################################################################################
+
+def start_preprocessing(show_timings=False):
+  while True:
+    print("In order to add a new individual's dataset to the database, we need the following information:")
+    print("animal id, minimum longitude, maximum longitude, minimum latitude, maximum latitude")
+    print("The longitude and latitude coordinates should correspond to those of the map image, which should be located in the maps folder.")
+    print("(Type 'exit' to return to the main menu)")
+
+    user_input = input(">>> ")
+    os.system('cls')
+
+    if user_input == 'exit': return
+
+    input_list = parse_individual_input(user_input)
+    if input_list is not None:
+      break
+
+  data_file = input_data_file()
+
+  ####################################################
+
+  print("The following data has been entered.")
+  print("Animal id to be preprocessed:", input_list[0])
+  print("Coordinates:", input_list[1], input_list[2], input_list[3], input_list[4])
+  print("Data:", data_file)
+
+  print("Do you want to continue? Press enter. Otherwise, type 'exit' to return to the main menu.")
+  user_input = input(">>> ")
+
+  if user_input == 'exit':
+    return
+
+  animal_id = input_list[0]
+  coords = input_list[1:]
+
+  # preprocess all years -> separate into years
+  years, indexes, processed_data = create_breeding_dataset(animal_id, coords, data_file, show_timings)
+
+  if years is None:
+    return
+
+  print("Finished pre-processing data")
+  print("Creating plots..")
+
+  # create basic scatter plots
+  create_raw_data_plots(animal_id, years, indexes, processed_data)
+
+########################################################################################################################################################################################################
+
+def start_batch_preprocessing(show_timings=False):
+  animals = []
+  print("In order to add multiple individuals to the database, we need the following information for each individual, one per line:")
+  print("animal id, minimum longitude, maximum longitude, minimum latitude, maximum latitude")
+  print("The longitude and latitude coordinates should correspond to those of the map image, which should be located in the maps folder.")
+  print("Press enter on an empty line when all individuals are entered.")
+  print("(Type 'exit' to return to the main menu)")
+
+  while True:
+    user_input = input(">>> ")
+
+    if user_input == 'exit': return
+    if len(user_input) == 0:
+      if len(animals) > 0:
+        break
+      print("ERROR: Enter at least one individual.")
+      continue
+
+    input_list = parse_individual_input(user_input)
+    if input_list is not None:
+      animals.append([input_list[0], input_list[1:]])
+
+  os.system('cls')
+  data_file = input_data_file()
+
+  ####################################################
+
+  print("The following data has been entered.")
+  for animal_id, coords in animals:
+    print("Animal id:", animal_id, "| Coordinates:", coords[0], coords[1], coords[2], coords[3])
+  print("Data:", data_file)
+
+  print("Do you want to continue? Press enter. Otherwise, type 'exit' to return to the main menu.")
+  user_input = input(">>> ")
+
+  if user_input == 'exit':
+    return
+
+  results = preprocess_batch(animals, data_file, None, show_timings)
+
+  print("Finished pre-processing data")
+  print("Creating plots..")
+
+  # create basic scatter plots
+  for (animal_id, _), (years, indexes, processed_data) in zip(animals, results):
+    create_raw_data_plots(animal_id, years, indexes, processed_data)
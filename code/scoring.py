@@ -0,0 +1,140 @@
+from sklearn import metrics
+from scipy import sparse
+import numpy as np
+
+# scoring mode of the clusterings: 'exact', 'sampled', or 'auto' (sampled from SAMPLED_MIN_POINTS points)
+SCORING_MODE = 'auto'
+SAMPLED_MIN_POINTS = 10000
+
+# the sample is stratified per cluster: proportional to the cluster size, with a minimum per cluster
+SAMPLE_SIZE = 2000
+SAMPLE_MIN_PER_CLUSTER = 20
+SAMPLE_SEED = 0
+
+# z-value of the reported confidence interval (95%)
+CONFIDENCE_Z = 1.96
+
+# penalty applied to the score of 2-cluster clusterings
+PENALTY_FACTOR = 0.85
+
+# number of distances used at once when scoring weighted points exactly
+SCORING_CHUNK_SIZE = 2 ** 22
+
+########################################################################################################################################################################################################
+
+# returns the given scoring mode, or SCORING_MODE as it is set now if it is None
+def return_scoring_mode (scoring):
+  if scoring is None:
+    return SCORING_MODE
+  return scoring
+
+########################################################################################################################################################################################################
+
+# checks if the given scoring mode results in sampled scoring for n points
+def is_sampled (scoring, n):
+  if scoring == 'auto':
+    return n >= SAMPLED_MIN_POINTS
+  return scoring == 'sampled'
+
+########################################################################################################################################################################################################
+
+# returns the silhouette value of the given rows, measured against all points
+# with weights, each point counts as that many identical points
+def return_silhouette_values (distance_matrix, labels, rows, weights=None):
+  n = len(labels)
+  if weights is None:
+    weights = np.ones(n)
+  num_clusters = labels.max() + 1
+  cluster_sizes = np.bincount(labels, weights=weights, minlength=num_clusters)
+
+  # summed distance of each row to the points of each cluster
+  membership = sparse.csr_matrix((np.asarray(weights, dtype=np.float32), (np.arange(n), labels)), shape=(n, num_clusters))
+  sums = np.asarray(membership.T.dot(distance_matrix[rows].T).T, dtype=np.float64)
+
+  own = labels[rows]
+  own_size = cluster_sizes[own]
+
+  # mean distance within the own cluster (a) and to the nearest other cluster (b)
+  a = sums[np.arange(len(rows)), own] / np.maximum(own_size - 1, 1)
+  means = sums / cluster_sizes
+  means[np.arange(len(rows)), own] = np.inf
+  b = means.min(axis=1)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    values = (b - a) / np.maximum(a, b)
+  # like sklearn, points in a cluster of their own have a silhouette value of 0
+  values[own_size <= 1] = 0
+  return np.nan_to_num(values)
+
+########################################################################################################################################################################################################
+
+# returns the exact silhouette score of weighted points, computed in blocks of rows
+def return_weighted_silhouette (distance_matrix, labels, weights):
+  n = len(labels)
+  rows = max(1, SCORING_CHUNK_SIZE // n)
+  values = np.concatenate([return_silhouette_values(distance_matrix, labels, np.arange(start, min(start + rows, n)), weights)
+                           for start in range(0, n, rows)])
+  return np.average(values, weights=weights)
+
+########################################################################################################################################################################################################
+
+# estimates the silhouette score from a stratified sample with a fixed seed
+# returns the estimate and the half-width of its confidence interval
+def return_sampled_silhouette (distance_matrix, labels, weights=None):
+  n = len(labels)
+  if weights is None:
+    weights = np.ones(n)
+  cluster_sizes = np.bincount(labels)
+  cluster_weights = np.bincount(labels, weights=weights)
+  rng = np.random.default_rng(SAMPLE_SEED)
+
+  estimate = 0
+  variance = 0
+  for cluster, size in enumerate(cluster_sizes):
+    if size == 0:
+      continue
+    sample_size = min(size, max(SAMPLE_MIN_PER_CLUSTER, round(SAMPLE_SIZE * size / n)))
+    rows = rng.choice(np.flatnonzero(labels == cluster), size=sample_size, replace=False)
+    values = return_silhouette_values(distance_matrix, labels, rows, weights)
+
+    # each cluster is weighted by its share of the points, with finite population correction
+    # within a cluster, the sampled points count by their weight (effective sample size for the variance)
+    share = cluster_weights[cluster] / cluster_weights.sum()
+    row_weights = weights[rows]
+    mean = np.average(values, weights=row_weights)
+    estimate += share * mean
+    if sample_size > 1:
+      effective_size = row_weights.sum() ** 2 / np.sum(row_weights ** 2)
+      spread = np.average((values - mean) ** 2, weights=row_weights) * sample_size / (sample_size - 1)
+      variance += share ** 2 * spread / effective_size * (1 - sample_size / size)
+
+  return estimate, CONFIDENCE_Z * np.sqrt(variance)
+
+########################################################################################################################################################################################################
+
+# returns the score of a clustering and the half-width of its confidence interval (0 for exact scores)
+# penalty lowers the score of 2-cluster clusterings, weights are the number of fixes each point stands for
+def score_clustering (distance_matrix, labels, scoring, penalty, weights=None):
+  _, labels = np.unique(labels, return_inverse=True)
+
+  if is_sampled(scoring, len(labels)):
+    score, interval = return_sampled_silhouette(distance_matrix, labels, weights)
+  elif weights is not None:
+    score = return_weighted_silhouette(distance_matrix, labels, weights)
+    interval = 0
+  else:
+    score = metrics.silhouette_score(distance_matrix, labels, metric='precomputed')
+    interval = 0
+
+  if penalty and labels.max() == 1:
+    score = score * PENALTY_FACTOR
+    interval = interval * PENALTY_FACTOR
+  return score, interval
+
+########################################################################################################################################################################################################
+
+# checks if the outcome of comparing a score with the best score (plus each of the margins) is uncertain
+def scores_overlap (score, interval, best_score, best_interval, margins):
+  if interval + best_interval == 0:
+    return False
+  return any(abs(score - (best_score + margin)) <= interval + best_interval for margin in margins)
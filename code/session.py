@@ -0,0 +1,174 @@
+from code.clustering import report, return_compression_grid, summarize_points, extract_subset_tree
+
+from collections import OrderedDict
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+# reclustering results are cached (least recently used first out), limited in memory (in MB) and number of entries
+RECLUSTER_CACHE_MEMORY = 256
+RECLUSTER_CACHE_ENTRIES = 64
+
+class ClusteringSession():
+  def __init__(self):
+    # points of the initial clustering, the grid they were compressed with and for every row (by index) its point
+    self.points = None
+    self.weights = None
+    self.grid = None
+    self.point_ids = None
+
+    # distances between the points and the linkage trees built on all points
+    self.distance_matrix = None
+    self.trees = {}
+
+    # reclustering results by selected rows, algorithm and penalty
+    # the cache can be used by background reclusterings, see code/speculation.py
+    self.recluster_cache = OrderedDict()
+    self.cache_memory = 0
+    self.cache_lock = threading.RLock()
+
+    # keeping track of reuse
+    self.reused_distances = 0
+    self.reused_trees = 0
+    self.cache_hits = 0
+    self.cache_misses = 0
+
+########################################################################################################################################################################################################
+
+  # returns the points of the session that the given rows map to (sorted) and for every row the index of its point in them
+  # returns None if a row is not in the session, or a point is only partly in the rows (its position would differ),
+  # or the session points are compressed with another grid than the rows would be on their own (see summarize_points),
+  # or the distances of the session points were not computed (the initial clustering stopped before)
+  def return_subset (self, index):
+    if self.point_ids is None or self.distance_matrix is None or self.grid != return_compression_grid(len(index)):
+      return None
+
+    point_ids = self.point_ids.reindex(index)
+    if point_ids.isna().any():
+      return None
+
+    subset, inverse = np.unique(point_ids.to_numpy(dtype=np.int64), return_inverse=True)
+    if not np.array_equal(np.bincount(inverse), self.weights[subset]):
+      return None
+    return subset, inverse
+
+########################################################################################################################################################################################################
+
+  # returns the points, weights, inverse and distance matrix of the data (with the given row index) and the subset of the session points
+  # the first data starts the session, data that maps onto session points reuses their distances, other data is computed from scratch (subset None)
+  # new distances are not computed yet (the matrix is None), the distances of the first data are kept with store_distance_matrix
+  def prepare (self, data, index, quiet=False):
+    if self.point_ids is None:
+      points, weights, inverse, grid = summarize_points(data, quiet)
+      self.points = points
+      self.weights = weights
+      self.grid = grid
+      self.point_ids = pd.Series(inverse, index=index)
+      return points, weights, inverse, None, np.arange(len(points))
+
+    result = self.return_subset(index)
+    if result is None:
+      if self.grid != return_compression_grid(len(index)):
+        report(quiet, "The initial clustering ran on points compressed with another grid, the points and distances of the data are computed again")
+      else:
+        report(quiet, "The data does not match the points of the initial clustering, distances are computed again")
+      points, weights, inverse, _ = summarize_points(data, quiet)
+      return points, weights, inverse, None, None
+
+    subset, inverse = result
+    self.reused_distances += 1
+    report(quiet, "Reusing the distances of", len(subset), "points from the initial clustering")
+    if len(subset) == len(self.points):
+      return self.points, self.weights, inverse, self.distance_matrix, subset
+    return self.points[subset], self.weights[subset], inverse, self.distance_matrix[np.ix_(subset, subset)], subset
+
+########################################################################################################################################################################################################
+
+  # returns the linkage tree of the subset, taken from the tree built on all points, or None if there is none or it cannot be reused
+  def return_tree (self, linkage, subset, distance_matrix, quiet=False):
+    if subset is None or linkage not in self.trees:
+      return None
+    if len(subset) == len(self.points):
+      tree = self.trees[linkage]
+    else:
+      tree = extract_subset_tree(self.trees[linkage], subset, linkage, distance_matrix)
+      if tree is None:
+        return None
+
+    self.reused_trees += 1
+    report(quiet, "Reusing the", linkage, "linkage tree of the initial clustering")
+    return tree
+
+########################################################################################################################################################################################################
+
+  # keeps a tree that was built on all points
+  def store_tree (self, linkage, subset, tree):
+    if subset is not None and len(subset) == len(self.points):
+      self.trees[linkage] = tree
+
+########################################################################################################################################################################################################
+
+  # keeps the distance matrix of all points
+  def store_distance_matrix (self, subset, distance_matrix):
+    if subset is not None and len(subset) == len(self.points):
+      self.distance_matrix = distance_matrix
+
+########################################################################################################################################################################################################
+
+  # returns the cache key of a reclustering: a fingerprint of the selected rows, the algorithm and the penalty
+  def return_cache_key (self, index, algorithm, penalty):
+    fingerprint = hashlib.sha1(np.ascontiguousarray(index, dtype=np.int64).tobytes()).hexdigest()
+    return (fingerprint, len(index), algorithm, penalty)
+
+########################################################################################################################################################################################################
+
+  # checks if the reclustering is cached, without counting it as a hit or miss
+  def is_cached (self, key):
+    with self.cache_lock:
+      return key in self.recluster_cache
+
+########################################################################################################################################################################################################
+
+  # returns if the reclustering is cached and its labels (None if it created only 1 cluster)
+  def lookup_reclustering (self, key):
+    with self.cache_lock:
+      if key not in self.recluster_cache:
+        self.cache_misses += 1
+        return False, None
+
+      self.cache_hits += 1
+      self.recluster_cache.move_to_end(key)
+      labels = self.recluster_cache[key]
+
+    print("Using the cached result of an earlier reclustering of these clusters")
+    return True, labels
+
+########################################################################################################################################################################################################
+
+  # caches the labels of a reclustering, the least recently used results are removed when the cache is full
+  def store_reclustering (self, key, labels):
+    if labels is not None:
+      labels = np.asarray(labels)
+    size = 0 if labels is None else labels.nbytes
+    if size > RECLUSTER_CACHE_MEMORY * 1024 ** 2:
+      return
+
+    with self.cache_lock:
+      if key in self.recluster_cache:
+        self.remove_reclustering(key)
+      self.recluster_cache[key] = labels
+      self.cache_memory += size
+
+      while self.cache_memory > RECLUSTER_CACHE_MEMORY * 1024 ** 2 or len(self.recluster_cache) > RECLUSTER_CACHE_ENTRIES:
+        self.remove_reclustering(next(iter(self.recluster_cache)))
+
+########################################################################################################################################################################################################
+
+  # removes a reclustering from the cache
+  def remove_reclustering (self, key):
+    with self.cache_lock:
+      labels = self.recluster_cache.pop(key)
+      if labels is not None:
+        self.cache_memory -= labels.nbytes
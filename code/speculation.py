@@ -0,0 +1,162 @@
+from code.clustering import ClusteringCancelled, create_cluster_dbscan, return_matrix_size
+from code.scoring import SAMPLE_SIZE, SAMPLE_SEED, return_silhouette_values
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import numpy as np
+
+# while the interactive plot is open, the DBSCAN reclustering of single clusters is computed in the background,
+# so a later click on 'recluster' for one of them is served from the session cache
+# SPECULATIVE_TARGET chooses the clusters: 'largest' (most rows) or 'worst' (lowest silhouette score)
+SPECULATIVE_RECLUSTER = True
+SPECULATIVE_TARGET = 'largest'
+SPECULATIVE_CLUSTERS = 2
+SPECULATIVE_WORKERS = 1
+
+# clusters with fewer rows are not reclustered, nor clusters whose distance matrix would be larger (in GB)
+SPECULATIVE_MIN_ROWS = 10
+SPECULATIVE_MEMORY = 1
+
+# the progress of background reclusterings is hidden unless verbose, each runs its candidates one after another
+SPECULATIVE_VERBOSE = False
+
+########################################################################################################################################################################################################
+
+class SpeculativeReclustering():
+  def __init__(self, session, target=SPECULATIVE_TARGET, num_clusters=SPECULATIVE_CLUSTERS, workers=SPECULATIVE_WORKERS, verbose=SPECULATIVE_VERBOSE):
+    self.session = session
+    self.target = target
+    self.num_clusters = num_clusters
+    self.verbose = verbose
+
+    # background work of the current labels, by cache key
+    self.executor = ThreadPoolExecutor(max_workers=workers)
+    self.futures = {}
+    self.cancelled = threading.Event()
+
+    # keeping track of served reclusterings
+    self.started = 0
+    self.served = 0
+
+########################################################################################################################################################################################################
+
+  # returns the mean silhouette value of each cluster, estimated from a sample of the session points, or None if the rows are not in the session
+  def return_cluster_scores (self, data):
+    result = self.session.return_subset(data.index)
+    if result is None:
+      return None
+
+    subset, inverse = result
+    _, labels = np.unique(data['label'].values, return_inverse=True)
+    point_labels = np.zeros(len(subset), dtype=np.int64)
+    point_labels[inverse] = labels
+
+    distance_matrix = self.session.distance_matrix
+    if len(subset) < len(self.session.points):
+      distance_matrix = distance_matrix[np.ix_(subset, subset)]
+    weights = self.session.weights[subset]
+
+    rng = np.random.default_rng(SAMPLE_SEED)
+    rows = rng.choice(len(subset), size=min(SAMPLE_SIZE, len(subset)), replace=False)
+    values = return_silhouette_values(distance_matrix, point_labels, rows, weights)
+
+    num_clusters = labels.max() + 1
+    totals = np.bincount(point_labels[rows], weights=values * weights[rows], minlength=num_clusters)
+    counts = np.bincount(point_labels[rows], weights=weights[rows], minlength=num_clusters)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      scores = totals / counts
+    # clusters that are not in the sample are reclustered last
+    return np.nan_to_num(scores, nan=np.inf)
+
+########################################################################################################################################################################################################
+
+  # returns the clusters to recluster in the background, in order
+  def return_targets (self, data):
+    clusters, sizes = np.unique(data['label'].values, return_counts=True)
+    order = np.argsort(-sizes, kind='stable')
+
+    if self.target == 'worst':
+      scores = self.return_cluster_scores(data)
+      if scores is not None:
+        order = np.argsort(scores, kind='stable')
+
+    return [clusters[i] for i in order if sizes[i] >= SPECULATIVE_MIN_ROWS][:self.num_clusters]
+
+########################################################################################################################################################################################################
+
+  # checks if the distance matrix of the rows fits within SPECULATIVE_MEMORY
+  def fits_in_memory (self, index):
+    result = self.session.return_subset(index)
+    n = len(index) if result is None else len(result[0])
+    return return_matrix_size(n) <= SPECULATIVE_MEMORY
+
+########################################################################################################################################################################################################
+
+  # starts the background reclusterings for the current labels, after cancelling the work for earlier labels
+  def start (self, data):
+    self.cancel()
+
+    for cluster in self.return_targets(data):
+      data_recluster = data[data['label'] == cluster]
+      key = self.session.return_cache_key(data_recluster.index, 'dbscan', False)
+      if self.session.is_cached(key) or not self.fits_in_memory(data_recluster.index):
+        continue
+
+      xy_data = data_recluster[['location-long', 'location-lat']].to_numpy(dtype=np.float64)
+      self.futures[key] = self.executor.submit(self.recluster, xy_data, data_recluster.index, key, self.cancelled)
+      self.started += 1
+
+########################################################################################################################################################################################################
+
+  # reclusters one cluster in the background and caches the labels in the session
+  def recluster (self, xy_data, index, key, cancelled):
+    if cancelled.is_set():
+      return
+
+    # a cancelled reclustering stops at the next candidate and caches nothing
+    try:
+      labels = create_cluster_dbscan(xy_data, session=self.session, index=index, quiet=not self.verbose, workers=1, cancelled=cancelled)
+    except ClusteringCancelled:
+      return
+
+    self.session.store_reclustering(key, labels)
+
+########################################################################################################################################################################################################
+
+  # waits for the background reclustering of the given clusters, if there is one, so the reclustering is served from the cache
+  # if it failed, nothing is cached and the reclustering runs as usual
+  def wait (self, data, clusters, algorithm, penalty):
+    if algorithm != 'dbscan' or penalty:
+      return
+
+    data_recluster = data[data['label'].isin(clusters)]
+    future = self.futures.get(self.session.return_cache_key(data_recluster.index, algorithm, penalty))
+    if future is None or future.cancelled():
+      return
+
+    if not future.done():
+      print("Waiting for the reclustering that started in the background")
+    try:
+      future.result()
+    except Exception as error:
+      print("The reclustering in the background failed (" + repr(error) + "), reclustering now")
+      return
+    self.served += 1
+
+########################################################################################################################################################################################################
+
+  # cancels the background work, work that already started stops at its next candidate
+  def cancel (self):
+    self.cancelled.set()
+    for future in self.futures.values():
+      future.cancel()
+    self.futures = {}
+    self.cancelled = threading.Event()
+
+########################################################################################################################################################################################################
+
+  # stops the background work, without waiting for a reclustering to reach its next candidate
+  def shutdown (self):
+    self.cancel()
+    self.executor.shutdown(wait=False, cancel_futures=True)
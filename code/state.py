@@ -0,0 +1,85 @@
+import numpy as np
+
+class ClusteringState():
+  def __init__(self, labeled_dataset):
+    # the rows of the data never change during the interactive clustering, only their labels (one int32 per row)
+    self.data = labeled_dataset
+    self.labels = labeled_dataset['label'].to_numpy(dtype=np.int32).copy()
+
+    # every adjustment is kept as a sparse change of labels, so it can be undone and redone any number of times
+    self.undo_stack = []
+    self.redo_stack = []
+
+########################################################################################################################################################################################################
+
+  # applies an adjustment: the given rows (positions) get new labels, after which all labels can be renumbered with a remap
+  # (a lookup array of old label -> new label), which is kept instead of the changes of all rows it renumbers
+  def apply (self, rows, labels, remap=None):
+    # only the rows whose label changes are kept
+    rows = np.asarray(rows, dtype=np.int64)
+    labels = np.asarray(labels, dtype=np.int32)
+    changed = self.labels[rows] != labels
+    rows = rows[changed]
+    change = {'rows': rows, 'old': self.labels[rows], 'new': labels[changed], 'remap': None, 'unmap': None}
+    self.labels[rows] = change['new']
+
+    if remap is not None:
+      # the renumbering is one-to-one on the labels that are left, so it can be reversed
+      remap = np.asarray(remap, dtype=np.int32)
+      present = np.flatnonzero(np.bincount(self.labels))
+      unmap = np.full(remap.max() + 1, -1, dtype=np.int32)
+      unmap[remap[present]] = present
+      self.labels = remap[self.labels]
+      change['remap'] = remap
+      change['unmap'] = unmap
+
+    self.undo_stack.append(change)
+    self.redo_stack = []
+    self.update_data()
+
+########################################################################################################################################################################################################
+
+  # reverts the last adjustment, returns False if there is none
+  def undo (self):
+    if len(self.undo_stack) == 0:
+      return False
+
+    change = self.undo_stack.pop()
+    if change['unmap'] is not None:
+      self.labels = change['unmap'][self.labels]
+    self.labels[change['rows']] = change['old']
+
+    self.redo_stack.append(change)
+    self.update_data()
+    return True
+
+########################################################################################################################################################################################################
+
+  # applies the last undone adjustment again, returns False if there is none
+  def redo (self):
+    if len(self.redo_stack) == 0:
+      return False
+
+    change = self.redo_stack.pop()
+    self.labels[change['rows']] = change['new']
+    if change['remap'] is not None:
+      self.labels = change['remap'][self.labels]
+
+    self.undo_stack.append(change)
+    self.update_data()
+    return True
+
+########################################################################################################################################################################################################
+
+  # returns the number of clusters after giving the rows new labels, without applying it
+  def return_num_clusters (self, rows, labels):
+    labels = np.asarray(labels)
+    size = max(self.labels.max(), labels.max()) + 1
+    kept = np.bincount(self.labels, minlength=size) - np.bincount(self.labels[rows], minlength=size)
+    return np.count_nonzero((kept > 0) | (np.bincount(labels, minlength=size) > 0))
+
+########################################################################################################################################################################################################
+
+  # writes the labels to the label column of the data, the data itself is not copied
+  def update_data (self):
+    self.data['label'] = self.labels.copy()
@@ -0,0 +1,281 @@
+import os
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# processed and clustered data are stored as a folder with one .npy file per column, which can be memory-mapped
+# appended rows get a chunk file per column, until the data is written again as a whole
+# timestamps are stored as int64 epoch (ns), text columns such as clusters and behaviours as category codes
+DATA_EXTENSION = ".columns"
+META_FILE = "columns.json"
+FLOAT32_COLUMNS = ['external-temperature', 'ground-speed', 'heading', 'height-above-msl']
+
+########################################################################################################################################################################################################
+
+# returns the path of the csv version of a data file
+def return_csv_filepath (filepath):
+  if filepath.endswith(DATA_EXTENSION):
+    return filepath[:-len(DATA_EXTENSION)] + ".csv"
+  return filepath
+
+########################################################################################################################################################################################################
+
+# checks if the data file exists, either in the binary format or as (older) csv file
+def data_exists (filepath):
+  return os.path.exists(filepath) or os.path.exists(return_csv_filepath(filepath))
+
+########################################################################################################################################################################################################
+
+# returns the values and description of a column in the binary format
+def encode_column (name, values):
+  if pd.api.types.is_datetime64_any_dtype(values):
+    return values.astype('datetime64[ns]').values.view('int64'), {'kind': 'datetime'}
+
+  if pd.api.types.is_bool_dtype(values):
+    return values.values.astype(bool), {'kind': 'bool'}
+
+  if pd.api.types.is_numeric_dtype(values):
+    if name in FLOAT32_COLUMNS:
+      return values.values.astype(np.float32), {'kind': 'number'}
+    return values.values, {'kind': 'number'}
+
+  # text columns are stored as categorical codes, missing values have code -1
+  categorical = pd.Categorical(values)
+  categories = categorical.categories.tolist()
+  codes = categorical.codes.astype(np.int16 if len(categories) < 32767 else np.int32)
+  return codes, {'kind': 'category', 'categories': [str(category) for category in categories]}
+
+########################################################################################################################################################################################################
+
+# returns a column read from the binary format, without copying the values
+def decode_column (values, description):
+  if description['kind'] == 'datetime':
+    return values.view('datetime64[ns]')
+  if description['kind'] == 'category':
+    # text stays categorical, code that edits these columns converts them with .astype(str) first
+    return pd.Categorical.from_codes(values, categories=description['categories'])
+  return values
+
+########################################################################################################################################################################################################
+
+# returns the description of the data in the binary format: the number of rows and a description per column
+# a column is stored in its file and, after appending, in its chunk files
+def read_meta (filepath):
+  with open(os.path.join(filepath, META_FILE), "r") as meta_file:
+    return json.load(meta_file)
+
+########################################################################################################################################################################################################
+
+# replaces the description of the data, the new version is only visible once it is completely written
+def write_meta (filepath, meta):
+  temp_path = os.path.join(filepath, META_FILE + ".tmp")
+  with open(temp_path, "w") as meta_file:
+    json.dump(meta, meta_file)
+  os.replace(temp_path, os.path.join(filepath, META_FILE))
+
+########################################################################################################################################################################################################
+
+# returns the files of a column in order, older versions only have one file per column
+def return_column_files (filepath, description):
+  return [os.path.join(filepath, name) for name in [description['file']] + description.get('chunks', [])]
+
+########################################################################################################################################################################################################
+
+# returns the length and dtype of a column file, read from its header without loading it
+def return_column_header (column_file):
+  with open(column_file, "rb") as opened_file:
+    version = np.lib.format.read_magic(opened_file)
+    if version == (1, 0):
+      shape, _, dtype = np.lib.format.read_array_header_1_0(opened_file)
+    else:
+      shape, _, dtype = np.lib.format.read_array_header_2_0(opened_file)
+  return shape[0], dtype
+
+########################################################################################################################################################################################################
+
+# returns a new name for a chunk file of a column, chunk files are numbered by the appends of the data, so a name is never used again
+def return_chunk_name (meta, description):
+  meta['chunks'] = meta.get('chunks', 0) + 1
+  return os.path.splitext(description['file'])[0].split("-")[0] + "-" + str(meta['chunks']) + ".npy"
+
+########################################################################################################################################################################################################
+
+# removes the last rows of each column by writing its last files again without them, returns the files that are no longer used
+def remove_last_rows (filepath, meta, rows):
+  unused = []
+  for description in meta['columns']:
+    names = [description['file']] + description.get('chunks', [])
+    remaining = rows
+    while remaining > 0:
+      length, _ = return_column_header(os.path.join(filepath, names[-1]))
+      if length <= remaining and len(names) > 1:
+        unused.append(names.pop())
+        remaining -= length
+        continue
+
+      # the file that keeps some of its rows (the first file can become empty) is written again
+      values = np.load(os.path.join(filepath, names[-1]))[:max(length - remaining, 0)]
+      unused.append(names.pop())
+      names.append(return_chunk_name(meta, description))
+      np.save(os.path.join(filepath, names[-1]), values)
+      break
+    description['file'] = names[0]
+    description['chunks'] = names[1:]
+
+  meta['rows'] = max(meta['rows'] - rows, 0)
+  return unused
+
+########################################################################################################################################################################################################
+
+# saves the data in the binary format
+def write_data (data, filepath):
+  temp_path = filepath + ".tmp"
+  if os.path.exists(temp_path):
+    shutil.rmtree(temp_path)
+  os.makedirs(temp_path)
+
+  columns = []
+  for i, name in enumerate(data.columns):
+    values, description = encode_column(name, data[name])
+    description['name'] = name
+    description['file'] = str(i) + ".npy"
+    np.save(os.path.join(temp_path, description['file']), np.ascontiguousarray(values))
+    columns.append(description)
+
+  with open(os.path.join(temp_path, META_FILE), "w") as meta_file:
+    json.dump({'rows': data.shape[0], 'columns': columns}, meta_file)
+
+  # replace the previous version
+  if os.path.isdir(filepath):
+    shutil.rmtree(filepath)
+  os.rename(temp_path, filepath)
+
+########################################################################################################################################################################################################
+
+# loads data in the binary format, or from a csv file if there is no binary version
+# columns can be used to only load the columns that are needed
+# the columns are copied into memory, so the data can be changed and its file rewritten or removed while it is in use
+# with mmap the columns stay memory-mapped and read-only, only for data that is read and released before its file changes
+def read_data (filepath, columns=None, mmap=False):
+  if not os.path.exists(filepath):
+    data = pd.read_csv(return_csv_filepath(filepath), delimiter = ",", usecols=columns)
+    if 'timestamp' in data.columns:
+      data['timestamp'] = pd.to_datetime(data['timestamp'])
+    return data
+
+  meta = read_meta(filepath)
+
+  data = {}
+  for description in meta['columns']:
+    if columns is not None and description['name'] not in columns:
+      continue
+    chunks = [np.load(column_file, mmap_mode='r') for column_file in return_column_files(filepath, description)]
+    # a column with appended chunks is joined into memory
+    if len(chunks) > 1:
+      values = np.concatenate(chunks)
+    elif mmap:
+      values = chunks[0]
+    else:
+      values = np.array(chunks[0])
+    chunks = None
+    data[description['name']] = decode_column(values, description)
+
+  return pd.DataFrame(data, copy=False)
+
+########################################################################################################################################################################################################
+
+# returns the last rows of the data, only the end of each column is read
+def read_last_rows (filepath, rows=1):
+  if not os.path.exists(filepath):
+    return read_data(filepath).tail(rows).reset_index(drop=True)
+
+  meta = read_meta(filepath)
+
+  data = {}
+  for description in meta['columns']:
+    values = []
+    needed = rows
+    for column_file in reversed(return_column_files(filepath, description)):
+      chunk = np.load(column_file, mmap_mode='r')
+      values.insert(0, np.array(chunk[max(len(chunk) - needed, 0):]))
+      needed -= len(values[0])
+      chunk = None
+      if needed <= 0:
+        break
+    data[description['name']] = decode_column(np.concatenate(values), description)
+
+  return pd.DataFrame(data, copy=False)
+
+########################################################################################################################################################################################################
+
+# appends rows to the data in the binary format, only the new rows are written, as a chunk file per column
+# the rows get the columns of the stored data, text columns can get new categories, drop_last removes stored rows first
+# data that only exists as (older) csv file, or whose codes no longer fit their type, is written again as a whole
+def append_data (data, filepath, drop_last=0):
+  if not os.path.exists(filepath):
+    if data_exists(filepath):
+      stored_data = read_data(filepath)
+      data = pd.concat([stored_data.iloc[:stored_data.shape[0] - drop_last], data], ignore_index=True)
+    write_data(data, filepath)
+    return
+
+  meta = read_meta(filepath)
+  data = data.reindex(columns=[description['name'] for description in meta['columns']])
+
+  chunks = []
+  for description in meta['columns']:
+    values = data[description['name']]
+    _, dtype = return_column_header(os.path.join(filepath, description['file']))
+
+    if description['kind'] == 'category':
+      # new categories are added after the stored ones, so the stored codes stay valid
+      categories = description['categories'] + sorted(set(values.dropna().astype(str)) - set(description['categories']))
+      if len(categories) > np.iinfo(dtype).max:
+        stored_data = read_data(filepath)
+        write_data(pd.concat([stored_data.iloc[:stored_data.shape[0] - drop_last], data], ignore_index=True), filepath)
+        return
+      codes = pd.Categorical(values.astype(str).where(values.notna()), categories=categories).codes
+      chunks.append((description, codes.astype(dtype), categories))
+    else:
+      encoded, _ = encode_column(description['name'], values)
+      chunks.append((description, encoded.astype(dtype), None))
+
+  unused = remove_last_rows(filepath, meta, drop_last) if drop_last > 0 else []
+
+  for description, values, categories in chunks:
+    name = return_chunk_name(meta, description)
+    np.save(os.path.join(filepath, name), np.ascontiguousarray(values))
+    description.setdefault('chunks', []).append(name)
+    if categories is not None:
+      description['categories'] = categories
+
+  meta['rows'] = meta['rows'] + data.shape[0]
+  write_meta(filepath, meta)
+
+  # files of removed rows are deleted once the new description is in place
+  for name in unused:
+    os.remove(os.path.join(filepath, name))
+
+########################################################################################################################################################################################################
+
+# removes a data file and its csv version
+def remove_data (filepath):
+  if os.path.isdir(filepath):
+    shutil.rmtree(filepath)
+
+  csv_filepath = return_csv_filepath(filepath)
+  if os.path.exists(csv_filepath):
+    os.remove(csv_filepath)
+
+########################################################################################################################################################################################################
+
+# exports the data file to csv, next to the binary version
+def export_csv (filepath):
+  data = read_data(filepath, mmap=True)
+  csv_filepath = return_csv_filepath(filepath)
+
+  print("Exporting data to", csv_filepath)
+  data.to_csv(csv_filepath, sep=",", index=False)
+  return csv_filepath